@@ -1,8 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
+from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from hashlib import blake2b
+import asyncio
+import json
 import logging
+import os
+import re
+import threading
 
-from ..models.query import EmbeddingRequest
+import numpy as np
+
+from ..models.query import EmbeddingRequest, BatchEmbeddingRequest
 from ..models.response import EmbeddingStatus
 from ..services.embedding_service import get_embedding_service
 from ..services.chroma_service import get_chroma_service
@@ -12,41 +24,78 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Global status tracking for embedding generation
-embedding_status = {
-    "status": "idle",
-    "progress": 0.0,
-    "total_documents": 0,
-    "processed_documents": 0,
-    "current_company": None,
-    "estimated_time_remaining": None,
-    "error": None
-}
+@dataclass(frozen=True, slots=True)
+class EmbedStatus:
+    """Immutable snapshot of the embedding generation state"""
+    status: str = "idle"
+    progress: float = 0.0
+    total_documents: int = 0
+    processed_documents: int = 0
+    current_company: Optional[str] = None
+    estimated_time_remaining: Optional[str] = None
+    error: Optional[str] = None
+
+
+# Current status snapshot; replaced wholesale under the lock so readers
+# never observe a partially updated state
+_status = EmbedStatus()
+_status_lock = threading.Lock()
+
+# Single-worker pool so the ingestion job runs on its own event loop in a
+# dedicated thread, keeping the serving loop free for /status and /query
+_ingest_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-ingest")
+
 
+def _update_status(**kwargs) -> None:
+    """Atomically publish a new status snapshot"""
+    global _status
+    with _status_lock:
+        _status = replace(_status, **kwargs)
 
-@router.get("/status", response_model=EmbeddingStatus)
+
+def _try_begin() -> bool:
+    """Atomically claim a new run, returning False if one is already active.
+
+    Check and transition happen under the same lock so concurrent POSTs to
+    /create cannot both pass the in-progress test.
+    """
+    global _status
+    with _status_lock:
+        if _status.status in ("starting", "processing"):
+            return False
+        _status = EmbedStatus(status="starting")
+        return True
+
+
+# response_model=None so FastAPI neither infers a model from the return
+# annotation nor re-validates the payload on every poll; the
+# EmbeddingStatus TypedDict documents the shape
+@router.get("/status", response_model=None)
 async def get_embedding_status() -> EmbeddingStatus:
     """
     Get the current status of embedding generation process.
-    
-    Returns information about:
+
+    Returns an EmbeddingStatus-shaped dict with:
     - Current processing status
     - Progress percentage
     - Documents processed/remaining
     - Estimated completion time
     """
     try:
-        global embedding_status
-        
+        status = _status
+
+        # Fields come from trusted internal state; TypedDict construction
+        # is a plain dict build, no validation on this frequently polled
+        # endpoint
         return EmbeddingStatus(
-            status=embedding_status["status"],
-            progress=embedding_status["progress"],
-            total_documents=embedding_status["total_documents"],
-            processed_documents=embedding_status["processed_documents"],
-            current_company=embedding_status["current_company"],
-            estimated_time_remaining=embedding_status["estimated_time_remaining"]
+            status=status.status,
+            progress=status.progress,
+            total_documents=status.total_documents,
+            processed_documents=status.processed_documents,
+            current_company=status.current_company,
+            estimated_time_remaining=status.estimated_time_remaining
         )
-        
+
     except Exception as e:
         logger.error(f"Failed to get embedding status: {e}")
         raise HTTPException(
@@ -58,7 +107,6 @@ async def get_embedding_status() -> EmbeddingStatus:
 @router.post("/create")
 async def create_embeddings(
     request: EmbeddingRequest,
-    background_tasks: BackgroundTasks,
     embedding_service=Depends(get_embedding_service),
     chroma_service=Depends(get_chroma_service),
     settings=Depends(get_settings)
@@ -73,33 +121,23 @@ async def create_embeddings(
     4. Runs as a background task with status tracking
     """
     try:
-        global embedding_status
-        
-        # Check if already processing
-        if embedding_status["status"] == "processing":
+        # Atomically claim the run; a losing concurrent POST gets a fast 409
+        if not _try_begin():
             raise HTTPException(
                 status_code=409,
                 detail="Embedding generation is already in progress"
             )
-        
-        # Reset status
-        embedding_status.update({
-            "status": "starting",
-            "progress": 0.0,
-            "total_documents": 0,
-            "processed_documents": 0,
-            "current_company": None,
-            "estimated_time_remaining": None,
-            "error": None
-        })
-        
-        # Start background task
-        background_tasks.add_task(
-            _generate_embeddings_background,
-            request,
-            embedding_service,
-            chroma_service,
-            settings
+
+        # Run the job in the dedicated ingest worker rather than on the
+        # serving event loop
+        _ingest_pool.submit(
+            asyncio.run,
+            _generate_embeddings_background(
+                request,
+                embedding_service,
+                chroma_service,
+                settings
+            )
         )
         
         logger.info("Started embedding generation background task")
@@ -122,6 +160,63 @@ async def create_embeddings(
         )
 
 
+@router.post("/batch")
+async def batch_encode(
+    request: BatchEmbeddingRequest,
+    embedding_service=Depends(get_embedding_service),
+    settings=Depends(get_settings)
+) -> ORJSONResponse:
+    """
+    Encode a batch of texts in a single model pass.
+
+    Lets clients coalesce many small encode calls into one request,
+    amortizing HTTP and model-dispatch overhead across the whole batch.
+    """
+    try:
+        if not embedding_service.is_available():
+            raise HTTPException(
+                status_code=503,
+                detail="Embedding service is currently unavailable"
+            )
+
+        texts = request.texts
+        if len(texts) > settings.MAX_BATCH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch size exceeds limit of {settings.MAX_BATCH} texts"
+            )
+
+        # encode_texts batches in length order internally so minibatches
+        # pad minimally; run off the event loop since encoding is CPU/GPU
+        # bound
+        embeddings = await asyncio.to_thread(
+            embedding_service.encode_texts,
+            texts,
+            False,
+            settings.BATCH_SIZE,
+            request.normalize
+        )
+
+        # Return ORJSONResponse directly so orjson's render (with
+        # OPT_SERIALIZE_NUMPY) actually receives the ndarray; a plain
+        # dict return would be routed through jsonable_encoder first,
+        # which cannot encode numpy arrays
+        return ORJSONResponse({
+            "embeddings": embeddings,
+            "count": len(texts),
+            "dim": int(embeddings.shape[1])
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to encode batch: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to encode batch: {str(e)}"
+        )
+
+
 @router.delete("/clear")
 async def clear_embeddings(
     company: str = None,
@@ -146,7 +241,7 @@ async def clear_embeddings(
                 message = f"Failed to clear embeddings for {company.upper()}"
         else:
             # Clear all companies
-            companies = list(chroma_service.company_names.keys())
+            companies = chroma_service.company_tuple
             cleared_count = 0
             
             for comp in companies:
@@ -159,11 +254,14 @@ async def clear_embeddings(
             message = f"Cleared embeddings for {cleared_count}/{len(companies)} companies and {cache_cleared} cached embeddings"
         
         logger.info(f"Embeddings cleared: {message}")
-        
+
+        _invalidate_chunk_counts()
+
+
         return {
             "message": message,
             "company": company or "all",
-            "timestamp": str(import_datetime().now())
+            "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
     except Exception as e:
@@ -206,8 +304,6 @@ async def _generate_embeddings_background(
     settings
 ):
     """Background task for generating embeddings"""
-    global embedding_status
-    
     try:
         import os
         import time
@@ -216,7 +312,7 @@ async def _generate_embeddings_background(
         logger.info("Starting background embedding generation")
         
         # Update status
-        embedding_status["status"] = "processing"
+        _update_status(status="processing")
         
         # Get transcript directory
         transcripts_dir = Path(settings.transcripts_directory)
@@ -228,183 +324,472 @@ async def _generate_embeddings_background(
         if request.companies:
             companies = [c.value for c in request.companies]
         else:
-            companies = list(chroma_service.company_names.keys())
-        
-        # Count total documents
-        total_docs = 0
-        for company in companies:
-            company_dir = transcripts_dir / company
-            if company_dir.exists():
-                total_docs += len(list(company_dir.glob("*.txt")))
-        
-        embedding_status["total_documents"] = total_docs
-        
-        processed_docs = 0
-        start_time = time.time()
+            companies = chroma_service.company_tuple
         
-        # Process each company
+        # Enumerate each company's transcript files once with os.scandir,
+        # shared by both the document count and the reader tasks
+        company_files: Dict[str, list] = {}
         for company in companies:
-            embedding_status["current_company"] = company
-            
             company_dir = transcripts_dir / company
             if not company_dir.exists():
                 logger.warning(f"Company directory not found: {company_dir}")
                 continue
-            
-            # Get transcript files
-            transcript_files = list(company_dir.glob("*.txt"))
-            
-            for transcript_file in transcript_files:
-                try:
-                    # Read transcript
-                    with open(transcript_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Extract metadata from filename
-                    filename = transcript_file.stem
-                    parts = filename.split('-')
-                    if len(parts) >= 3:
-                        date_str = f"{parts[0]}-{parts[1]}-{parts[2]}"
-                    else:
-                        date_str = "unknown"
-                    
-                    # Split content into chunks (simple sentence-based chunking)
-                    chunks = _split_into_chunks(content, max_chunk_size=512)
-                    
-                    # Create document ID
-                    document_id = f"{company.lower()}_{filename}"
-                    
-                    # Prepare metadata
-                    metadata = {
-                        "date": date_str,
-                        "company": company,
-                        "filename": transcript_file.name,
-                        "quarter": _extract_quarter_from_filename(filename)
-                    }
-                    
-                    # Store in ChromaDB
-                    success = chroma_service.store_document_chunks(
-                        company=company,
-                        document_id=document_id,
-                        chunks=chunks,
-                        metadata=metadata
+            with os.scandir(company_dir) as entries:
+                company_files[company] = [
+                    entry for entry in entries
+                    if entry.is_file() and entry.name.endswith('.txt')
+                ]
+
+        total_docs = sum(len(files) for files in company_files.values())
+        _update_status(total_documents=total_docs)
+
+        processed_docs = 0
+        start_time = time.time()
+
+        # Encode chunks from many files in one batch instead of a forward
+        # pass per transcript
+        flush_threshold = request.batch_size * 8
+
+        # Resolve the encoder tokenizer once so chunks can be packed to the
+        # model's token window; fall back to character-based chunking
+        tokenizer = None
+        max_tokens = 510
+        if embedding_service.is_available():
+            try:
+                tokenizer = embedding_service.get_tokenizer()
+                max_tokens = embedding_service.get_max_seq_length() - 2
+            except Exception as e:
+                logger.warning(f"Tokenizer unavailable, using character chunking: {e}")
+
+        # Bound concurrent company readers; a single consumer owns the
+        # embedding model and ChromaDB writes
+        semaphore = asyncio.Semaphore(4)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=flush_threshold * 2)
+
+        async def _read_company(company: str) -> None:
+            """Read and chunk one company's transcripts into the shared queue"""
+            async with semaphore:
+                # Hoisted so per-file document IDs are a single concat
+                doc_prefix = company.lower() + "_"
+                for entry in company_files.get(company, []):
+                    item = await asyncio.to_thread(
+                        _read_transcript, company, entry,
+                        tokenizer, max_tokens, doc_prefix
                     )
-                    
-                    if success:
-                        logger.info(f"Processed {transcript_file.name} - {len(chunks)} chunks")
-                    else:
-                        logger.error(f"Failed to process {transcript_file.name}")
-                    
-                    processed_docs += 1
-                    
-                    # Update progress
-                    progress = (processed_docs / total_docs) * 100
-                    embedding_status["progress"] = round(progress, 1)
-                    embedding_status["processed_documents"] = processed_docs
-                    
-                    # Estimate remaining time
-                    elapsed_time = time.time() - start_time
-                    if processed_docs > 0:
-                        avg_time_per_doc = elapsed_time / processed_docs
-                        remaining_docs = total_docs - processed_docs
-                        estimated_remaining = avg_time_per_doc * remaining_docs
-                        
-                        # Convert to human readable format
-                        if estimated_remaining < 60:
-                            time_str = f"{int(estimated_remaining)}s"
-                        elif estimated_remaining < 3600:
-                            time_str = f"{int(estimated_remaining // 60)}m {int(estimated_remaining % 60)}s"
-                        else:
-                            hours = int(estimated_remaining // 3600)
-                            minutes = int((estimated_remaining % 3600) // 60)
-                            time_str = f"{hours}h {minutes}m"
-                        
-                        embedding_status["estimated_time_remaining"] = time_str
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process {transcript_file}: {e}")
-                    continue
-        
-        # Completion
-        embedding_status.update({
-            "status": "completed",
-            "progress": 100.0,
-            "current_company": None,
-            "estimated_time_remaining": None
-        })
+                    if item is not None:
+                        await queue.put((company, item))
+
+        async def _consume() -> None:
+            """Drain the queue, encoding and bulk-storing per-company buffers"""
+            nonlocal processed_docs
+
+            # Per-company buffers since bulk adds target one collection
+            buffers: Dict[str, list] = {}
+            chunk_counts: Dict[str, int] = {}
+
+            async def _flush_company(company: str) -> None:
+                nonlocal processed_docs
+                pending = buffers.pop(company)
+                chunk_counts.pop(company, None)
+                processed_docs += await asyncio.to_thread(
+                    _flush_pending, pending, company,
+                    embedding_service, chroma_service, request.batch_size
+                )
+                _update_progress(processed_docs, total_docs, start_time)
+
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    break
+
+                company, item = entry
+                _update_status(current_company=company)
+
+                buffers.setdefault(company, []).append(item)
+                chunk_counts[company] = chunk_counts.get(company, 0) + len(item[1])
+
+                # Flush once enough chunks are buffered to fill large batches
+                if chunk_counts[company] >= flush_threshold:
+                    await _flush_company(company)
+
+            # Flush whatever is left once all readers are done
+            for company in list(buffers.keys()):
+                await _flush_company(company)
+
+        consumer = asyncio.create_task(_consume())
+        await asyncio.gather(*(_read_company(company) for company in companies))
+        await queue.put(None)
+        await consumer
+
+        # Completion; publishes the final count in case the throttled
+        # progress updates skipped the last flush
+        _update_status(
+            status="completed",
+            progress=100.0,
+            processed_documents=processed_docs,
+            current_company=None,
+            estimated_time_remaining=None
+        )
         
         total_time = time.time() - start_time
         logger.info(f"Embedding generation completed in {total_time:.2f}s")
-        
+
+        _invalidate_chunk_counts()
+
     except Exception as e:
         logger.error(f"Background embedding generation failed: {e}")
-        embedding_status.update({
-            "status": "error",
-            "error": str(e)
-        })
+        _update_status(status="error", error=str(e))
+
+
+def _invalidate_chunk_counts() -> None:
+    """Drop the RAG pipeline's cached chunk counts after embeddings change"""
+    try:
+        from ..core.rag_pipeline import get_rag_pipeline
+        get_rag_pipeline().invalidate_chunk_counts()
+    except Exception as e:
+        logger.warning(f"Failed to invalidate chunk count cache: {e}")
+
+
+def _read_transcript(
+    company: str,
+    entry,
+    tokenizer=None,
+    max_tokens: int = 510,
+    doc_prefix: Optional[str] = None
+) -> tuple:
+    """Read and chunk a transcript dir entry, returning (document_id, chunks, metadata)"""
+    try:
+        # Extract metadata from filename
+        filename = entry.name.rsplit('.', 1)[0]
+        parts = filename.split('-')
+        if len(parts) >= 3:
+            date_str = f"{parts[0]}-{parts[1]}-{parts[2]}"
+        else:
+            date_str = "unknown"
+
+        # Pack chunks to the model's token window when the tokenizer is
+        # available, otherwise fall back to character-based chunking
+        if tokenizer is not None:
+            chunks = _load_or_chunk(entry, tokenizer, max_tokens)
+        else:
+            # Read raw bytes and decode once, avoiding TextIOWrapper overhead
+            with open(entry.path, 'rb') as f:
+                content = f.read().decode('utf-8', errors='replace')
+            chunks = _split_into_chunks(content, max_chunk_size=512)
+
+        # Create document ID
+        document_id = (doc_prefix or company.lower() + "_") + filename
+
+        # Prepare metadata; year/month/quarter are parsed once here so the
+        # query path never re-parses date strings, and Chroma where-clauses
+        # can filter on them directly
+        metadata = {
+            "date": date_str,
+            "company": company,
+            "filename": entry.name,
+            "quarter": _extract_quarter_from_filename(filename)
+        }
+        year, month = _extract_year_month(filename)
+        if year is not None:
+            metadata["year"] = year
+            metadata["month"] = month
+
+        return (document_id, chunks, metadata)
+
+    except Exception as e:
+        logger.error(f"Failed to process {entry.path}: {e}")
+        return None
+
+
+def _flush_pending(
+    pending: list,
+    company: str,
+    embedding_service,
+    chroma_service,
+    batch_size: int
+) -> int:
+    """Encode buffered chunks in a single batch and store them per document"""
+    texts = [chunk for _, chunks, _ in pending for chunk in chunks]
+
+    # Dedup identical chunks (boilerplate repeats across transcripts) and
+    # skip any already in the embedding cache; only unique misses are encoded
+    digests = [blake2b(text.encode(), digest_size=16).digest() for text in texts]
+    unique = {}
+    for digest, text in zip(digests, texts):
+        unique.setdefault(digest, text)
+
+    resolved = embedding_service.get_cached_many(unique)
+    miss_digests = [digest for digest in unique if digest not in resolved]
+    miss_texts = [unique[digest] for digest in miss_digests]
+
+    if miss_texts:
+        # encode_texts batches in length order internally, so each
+        # minibatch only pads to its own longest chunk
+        miss_embeddings = embedding_service.encode_texts(
+            miss_texts, show_progress=False, batch_size=batch_size
+        )
+
+        # One bulk cache write for the whole flush: a single lock/commit
+        # instead of an fsync per embedding
+        embedding_service.save_embeddings_many(miss_texts, miss_embeddings)
+        for digest, embedding in zip(miss_digests, miss_embeddings):
+            resolved[digest] = embedding
+
+    embeddings = [resolved[digest] for digest in digests]
+
+    # Prepare one bulk payload covering every document in the buffer so the
+    # whole flush costs a single ChromaDB transaction
+    ids = []
+    documents = []
+    metadatas = []
+    embeddings_list = []
+    offset = 0
+
+    for document_id, chunks, metadata in pending:
+        doc_embeddings = embeddings[offset:offset + len(chunks)]
+        offset += len(chunks)
+
+        ids.extend(chroma_service.make_chunk_ids(document_id, len(chunks)))
+        documents.extend(chunks)
+        metadatas.extend(
+            chroma_service.build_chunk_metadatas(metadata, document_id, company, len(chunks))
+        )
+        embeddings_list.extend(doc_embeddings)
+
+    success = chroma_service.add_bulk(
+        company=company,
+        ids=ids,
+        embeddings=np.asarray(embeddings_list, dtype=np.float32),
+        metadatas=metadatas,
+        documents=documents
+    )
+
+    if success:
+        logger.info(f"Stored {len(ids)} chunks from {len(pending)} documents for {company}")
+    else:
+        logger.error(f"Failed to bulk-store {len(pending)} documents for {company}")
+
+    return len(pending)
+
+
+# Next monotonic deadline for progress publication; written only by the
+# single ingest consumer
+_next_progress_at = 0.0
+
+
+def _update_progress(processed_docs: int, total_docs: int, start_time: float) -> None:
+    """Publish progress and time-remaining estimates at most once per second"""
+    global _next_progress_at
+
+    import time
+
+    # Skip the string formatting and status write while throttled
+    now = time.monotonic()
+    if now < _next_progress_at:
+        return
+    _next_progress_at = now + 1.0
+
+    updates = {"processed_documents": processed_docs}
+    if total_docs > 0:
+        progress = (processed_docs / total_docs) * 100
+        updates["progress"] = round(progress, 1)
+
+    # Estimate remaining time
+    elapsed_time = time.time() - start_time
+    if processed_docs > 0:
+        avg_time_per_doc = elapsed_time / processed_docs
+        remaining_docs = total_docs - processed_docs
+        estimated_remaining = avg_time_per_doc * remaining_docs
+
+        # Convert to human readable format
+        if estimated_remaining < 60:
+            time_str = f"{int(estimated_remaining)}s"
+        elif estimated_remaining < 3600:
+            time_str = f"{int(estimated_remaining // 60)}m {int(estimated_remaining % 60)}s"
+        else:
+            hours = int(estimated_remaining // 3600)
+            minutes = int((estimated_remaining % 3600) // 60)
+            time_str = f"{hours}h {minutes}m"
+
+        updates["estimated_time_remaining"] = time_str
+
+    _update_status(**updates)
+
+
+# Precompiled patterns shared by the chunking/metadata helpers below
+_SENT_SPLIT = re.compile(r'[.!?]+')
+
+# (pattern, year_comes_first) pairs for dates embedded in filenames
+_DATE_PATTERNS = [
+    (re.compile(r'(\d{4})-(\w{3})-\d{2}'), True),   # 2020-Apr-30
+    (re.compile(r'(\w{3})-(\d{4})'), False),        # Apr-2020
+]
+
+_MONTH_TO_QUARTER = {
+    'Jan': 'Q1', 'Feb': 'Q1', 'Mar': 'Q1',
+    'Apr': 'Q2', 'May': 'Q2', 'Jun': 'Q2',
+    'Jul': 'Q3', 'Aug': 'Q3', 'Sep': 'Q3',
+    'Oct': 'Q4', 'Nov': 'Q4', 'Dec': 'Q4'
+}
+
+_MONTH_NUM = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4,
+    'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8,
+    'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+
+def _extract_year_month(filename: str) -> tuple:
+    """Extract (year, month) ints from a transcript filename, or (None, None)"""
+    for pattern, year_first in _DATE_PATTERNS:
+        match = pattern.search(filename)
+        if match:
+            if year_first:
+                year, month = match.groups()
+            else:
+                month, year = match.groups()
+            month_num = _MONTH_NUM.get(month)
+            if month_num is not None:
+                return int(year), month_num
+    return None, None
 
 
 def _split_into_chunks(text: str, max_chunk_size: int = 512) -> list[str]:
     """Split text into chunks based on sentences"""
-    import re
-    
     # Split by sentences
-    sentences = re.split(r'[.!?]+', text)
-    
+    sentences = _SENT_SPLIT.split(text)
+
     chunks = []
-    current_chunk = ""
-    
+    current_parts = []
+    current_len = 0
+
     for sentence in sentences:
         sentence = sentence.strip()
         if not sentence:
             continue
-        
+
         # Check if adding this sentence would exceed max chunk size
-        if len(current_chunk) + len(sentence) > max_chunk_size and current_chunk:
-            chunks.append(current_chunk.strip())
-            current_chunk = sentence
+        if current_len + len(sentence) + 1 > max_chunk_size and current_parts:
+            chunks.append(" ".join(current_parts))
+            current_parts = [sentence]
+            current_len = len(sentence)
         else:
-            current_chunk += " " + sentence if current_chunk else sentence
-    
+            current_parts.append(sentence)
+            current_len += len(sentence) + 1
+
     # Add the last chunk
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
-    
+    if current_parts:
+        chunks.append(" ".join(current_parts))
+
     return chunks
 
 
+# Sidecar extension for per-transcript chunk caches
+_CHUNK_CACHE_SUFFIX = ".chunks.json"
+
+
+def _load_or_chunk(entry, tokenizer, max_tokens: int) -> list[str]:
+    """Load token-aware chunks from a sidecar cache, recomputing them when
+    the transcript or tokenizer configuration has changed"""
+    cache_path = entry.path + _CHUNK_CACHE_SUFFIX
+    tokenizer_name = str(getattr(tokenizer, "name_or_path", ""))
+
+    try:
+        if os.path.getmtime(cache_path) >= entry.stat().st_mtime:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if (cached.get("tokenizer") == tokenizer_name
+                    and cached.get("max_tokens") == max_tokens):
+                return cached["chunks"]
+    except (OSError, ValueError):
+        pass
+
+    # Read raw bytes and decode once, avoiding TextIOWrapper overhead
+    with open(entry.path, 'rb') as f:
+        content = f.read().decode('utf-8', errors='replace')
+    chunks = _split_into_chunks_tokenwise(content, tokenizer, max_tokens)
+
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "tokenizer": tokenizer_name,
+                "max_tokens": max_tokens,
+                "chunks": chunks
+            }, f)
+    except OSError as e:
+        logger.warning(f"Failed to write chunk cache {cache_path}: {e}")
+
+    return chunks
+
+
+def _split_into_chunks_tokenwise(text: str, tokenizer, max_tokens: int) -> list[str]:
+    """Split text into chunks packed to the model's token window.
+
+    Tokenizes the whole document once with offset mapping, counts tokens per
+    sentence, and packs sentences until a chunk approaches max_tokens. Chunks
+    are emitted as slices of the original string, so no detokenization cost.
+    """
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = encoding["offset_mapping"]
+    if not offsets:
+        return []
+
+    # Sentence spans on the original string, delimited by the boundary regex
+    spans = []
+    last = 0
+    for match in _SENT_SPLIT.finditer(text):
+        end = match.end()
+        if text[last:end].strip():
+            spans.append((last, end))
+        last = end
+    if text[last:].strip():
+        spans.append((last, len(text)))
+
+    chunks = []
+    token_idx = 0
+    total_tokens = len(offsets)
+    chunk_start = None
+    chunk_end = 0
+    chunk_tokens = 0
+
+    for start, end in spans:
+        # Count tokens whose offsets fall within this sentence
+        sentence_tokens = 0
+        while token_idx < total_tokens and offsets[token_idx][0] < end:
+            sentence_tokens += 1
+            token_idx += 1
+
+        # Close the current chunk if this sentence would overflow it
+        if chunk_start is not None and chunk_tokens + sentence_tokens > max_tokens:
+            chunks.append(text[chunk_start:chunk_end].strip())
+            chunk_start = start
+            chunk_tokens = 0
+
+        if chunk_start is None:
+            chunk_start = start
+        chunk_tokens += sentence_tokens
+        chunk_end = end
+
+    if chunk_start is not None:
+        last_chunk = text[chunk_start:chunk_end].strip()
+        if last_chunk:
+            chunks.append(last_chunk)
+
+    return [chunk for chunk in chunks if chunk]
+
+
 def _extract_quarter_from_filename(filename: str) -> str:
     """Extract quarter information from filename"""
-    import re
-    
-    # Pattern for dates in filename
-    date_patterns = [
-        r'(\d{4})-(\w{3})-\d{2}',  # 2020-Apr-30
-        r'(\w{3})-(\d{4})',        # Apr-2020
-    ]
-    
-    month_to_quarter = {
-        'Jan': 'Q1', 'Feb': 'Q1', 'Mar': 'Q1',
-        'Apr': 'Q2', 'May': 'Q2', 'Jun': 'Q2',
-        'Jul': 'Q3', 'Aug': 'Q3', 'Sep': 'Q3',
-        'Oct': 'Q4', 'Nov': 'Q4', 'Dec': 'Q4'
-    }
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, filename)
+    for pattern, year_first in _DATE_PATTERNS:
+        match = pattern.search(filename)
         if match:
-            if pattern.startswith(r'(\d{4})'):
+            if year_first:
                 year, month = match.groups()
             else:
                 month, year = match.groups()
-            
-            quarter = month_to_quarter.get(month, 'Q1')
+
+            quarter = _MONTH_TO_QUARTER.get(month, 'Q1')
             return f"{quarter} {year}"
-    
-    return "Unknown"
 
+    return "Unknown"
 
-def import_datetime():
-    """Helper to import datetime for string formatting"""
-    from datetime import datetime
-    return datetime 
\ No newline at end of file
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from datetime import datetime
+from typing import Any, Dict, List
 import logging
 
 from ..models.response import HealthResponse, CompaniesResponse, CompanyInfo
@@ -19,7 +20,7 @@ async def health_check(
     gemini_service=Depends(get_gemini_service),
     embedding_service=Depends(get_embedding_service),
     settings=Depends(get_settings)
-) -> HealthResponse:
+) -> Response:
     """
     Comprehensive health check for all system components.
     
@@ -38,11 +39,11 @@ async def health_check(
             logger.error(f"Database health check failed: {e}")
             database_status = f"error: {str(e)}"
         
-        # Check embedding model status
+        # Check embedding model status; report state only, the model is
+        # loaded and warmed at startup
         try:
             if embedding_service.is_available():
-                model = embedding_service.load_model()
-                embeddings_status = "loaded"
+                embeddings_status = "loaded" if embedding_service.model is not None else "not loaded"
             else:
                 embeddings_status = "unavailable: sentence-transformers compatibility issue"
         except Exception as e:
@@ -55,17 +56,20 @@ async def health_check(
         else:
             overall_status = "healthy"
         
-        return HealthResponse(
+        # Fields come from trusted internal state; skip validation on this
+        # frequently polled endpoint and serialize with pydantic-core
+        # directly instead of the jsonable_encoder round-trip
+        payload = HealthResponse.model_construct(
             status=overall_status,
             timestamp=datetime.now(),
             version=settings.VERSION,
             database_status=database_status,
             embeddings_status=embeddings_status
         )
-        
+
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return HealthResponse(
+        payload = HealthResponse.model_construct(
             status="error",
             timestamp=datetime.now(),
             version=settings.VERSION,
@@ -73,11 +77,16 @@ async def health_check(
             embeddings_status="unknown"
         )
 
+    return Response(
+        content=payload.model_dump_json(exclude_none=True),
+        media_type="application/json"
+    )
+
 
 @router.get("/companies", response_model=CompaniesResponse)
 async def get_companies(
     chroma_service=Depends(get_chroma_service)
-) -> CompaniesResponse:
+) -> Response:
     """
     Get information about all available companies and their transcripts.
     
@@ -105,21 +114,26 @@ async def get_companies(
             companies.append(company_info)
             total_transcripts += stats["transcript_count"]
         
-        return CompaniesResponse(
+        payload = CompaniesResponse.model_construct(
             companies=companies,
             total_companies=len(companies),
             total_transcripts=total_transcripts
         )
-        
+
     except Exception as e:
         logger.error(f"Failed to get companies info: {e}")
         # Return empty response on error
-        return CompaniesResponse(
+        payload = CompaniesResponse.model_construct(
             companies=[],
             total_companies=0,
             total_transcripts=0
         )
 
+    return Response(
+        content=payload.model_dump_json(exclude_none=True),
+        media_type="application/json"
+    )
+
 
 @router.get("/transcripts/{company}")
 async def get_company_transcripts(
@@ -139,7 +153,7 @@ async def get_company_transcripts(
         company = company.upper()
         
         # Validate company
-        if company not in chroma_service.company_names:
+        if company not in chroma_service.company_set:
             from fastapi import HTTPException
             raise HTTPException(status_code=404, detail=f"Company {company} not found")
         
@@ -215,6 +229,59 @@ async def get_system_info(
         raise HTTPException(status_code=500, detail=f"Failed to retrieve system information: {str(e)}")
 
 
+@router.post("/status/bulk")
+async def bulk_status(
+    endpoints: List[str],
+    chroma_service=Depends(get_chroma_service),
+    embedding_service=Depends(get_embedding_service),
+    gemini_service=Depends(get_gemini_service)
+) -> Dict[str, Any]:
+    """
+    Report availability for several endpoints in one round-trip.
+
+    Dashboards previously probed each endpoint with its own HTTP request;
+    this aggregates the same availability checks server-side so clients
+    pay one round-trip instead of N. Unknown endpoint paths report True,
+    matching the client's optimistic default for unprobeable routes.
+    """
+    def database_ok() -> bool:
+        try:
+            chroma_service.db_manager.list_collections()
+            return True
+        except Exception:
+            return False
+
+    checks = {
+        "/health": lambda: True,
+        "/companies": database_ok,
+        "/system/info": lambda: True,
+        "/api/v1/query": chroma_service.is_available,
+        "/api/v1/search": chroma_service.is_available,
+        "/api/v1/insights": lambda: gemini_service.model is not None,
+        "/api/v1/embeddings/status": embedding_service.is_available,
+        "/api/v1/embeddings/create": embedding_service.is_available,
+        "/api/v1/embeddings/clear": lambda: True,
+        "/api/v1/embeddings/cache/info": lambda: True,
+    }
+
+    statuses: Dict[str, bool] = {}
+    memo: Dict[Any, bool] = {}
+    for endpoint in endpoints:
+        check = checks.get(endpoint)
+        if check is None:
+            statuses[endpoint] = True
+            continue
+        # Shared checks (e.g. the database probe) run once per request
+        if check not in memo:
+            try:
+                memo[check] = bool(check())
+            except Exception:
+                memo[check] = False
+        statuses[endpoint] = memo[check]
+
+    return {"statuses": statuses}
+
+
 # Dependency import for use in other endpoints
 def get_chroma_service_dep():
     """Dependency function for getting chroma service"""
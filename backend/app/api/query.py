@@ -1,9 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any
+import asyncio
+import json
 import logging
 
 from ..models.query import QueryRequest, SearchRequest
-from ..models.response import QueryResponse, SearchResponse, SearchResult
+from ..models.response import QueryResponse, SearchResponse, SearchResult, SOURCES_ADAPTER
 from ..core.rag_pipeline import get_rag_pipeline
 from ..services.chroma_service import get_chroma_service
 from ..core.config import get_settings
@@ -18,7 +21,7 @@ async def process_rag_query(
     request: QueryRequest,
     rag_pipeline=Depends(get_rag_pipeline),
     chroma_service=Depends(get_chroma_service)
-) -> QueryResponse:
+) -> Response:
     """
     Process a RAG query and return AI-generated response based on financial transcripts.
     
@@ -28,7 +31,7 @@ async def process_rag_query(
     3. Returns the answer with source attribution and metadata
     """
     try:
-        logger.info(f"Received RAG query: {request.question[:100]}...")
+        logger.info("Received RAG query: %.100s...", request.question)
         
         # Check if embedding services are available
         if not chroma_service.is_available():
@@ -44,9 +47,15 @@ async def process_rag_query(
         
         # Process through RAG pipeline
         response = await rag_pipeline.process_query(request)
-        
-        logger.info(f"RAG query processed successfully")
-        return response
+
+        logger.info("RAG query processed successfully")
+        # Serialize with pydantic-core directly, skipping FastAPI's
+        # jsonable_encoder round-trip; exclude_none drops the Optional
+        # fields (quarter, chunk_index, ...) that are often unset
+        return Response(
+            content=response.model_dump_json(exclude_none=True),
+            media_type="application/json"
+        )
         
     except HTTPException:
         raise
@@ -58,11 +67,86 @@ async def process_rag_query(
         )
 
 
+@router.post("/query/stream")
+async def process_rag_query_stream(
+    request: QueryRequest,
+    rag_pipeline=Depends(get_rag_pipeline),
+    chroma_service=Depends(get_chroma_service)
+) -> StreamingResponse:
+    """
+    Process a RAG query and stream the answer over Server-Sent Events.
+
+    Emits the retrieved sources as the first event, then the answer token
+    chunks as Gemini produces them, so clients can render the response
+    incrementally instead of waiting for the full generation.
+    """
+    if not chroma_service.is_available():
+        raise HTTPException(
+            status_code=503,
+            detail="Embedding services are currently unavailable. "
+                   "Please check that sentence-transformers is properly installed and configured."
+        )
+
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    settings = get_settings()
+    similarity_threshold = request.similarity_threshold or settings.SIMILARITY_THRESHOLD
+    temperature = request.temperature or settings.TEMPERATURE
+
+    date_filter = None
+    if request.date_range:
+        date_filter = {}
+        if request.date_range.start:
+            date_filter["start"] = request.date_range.start
+        if request.date_range.end:
+            date_filter["end"] = request.date_range.end
+
+    async def event_stream():
+        try:
+            chunks = await asyncio.to_thread(
+                chroma_service.search_similar_chunks,
+                query=request.question,
+                company_filter=request.company_filter or None,
+                max_results=request.max_results,
+                similarity_threshold=similarity_threshold,
+                date_filter=date_filter
+            )
+
+            # Sources go out first so the client can attribute tokens as
+            # they stream in; the precompiled adapter serializes the whole
+            # list in one pydantic-core pass
+            sources = rag_pipeline.format_sources(chunks)
+            sources_json = SOURCES_ADAPTER.dump_json(sources, exclude_none=True).decode()
+            yield f"event: sources\ndata: {sources_json}\n\n"
+
+            # The Gemini stream is a blocking iterator; pull each chunk in
+            # the threadpool so the event loop stays responsive
+            iterator = rag_pipeline.gemini_service.generate_response_stream(
+                question=request.question,
+                sources=chunks,
+                temperature=temperature
+            )
+            while True:
+                token = await asyncio.to_thread(next, iterator, None)
+                if token is None:
+                    break
+                yield f"event: token\ndata: {json.dumps(token)}\n\n"
+
+            yield "event: done\ndata: {}\n\n"
+
+        except Exception as e:
+            logger.error(f"Failed to stream RAG query: {e}")
+            yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/search", response_model=SearchResponse)
 async def vector_similarity_search(
     request: SearchRequest,
     chroma_service=Depends(get_chroma_service)
-) -> SearchResponse:
+) -> Response:
     """
     Perform direct vector similarity search without LLM generation.
     
@@ -72,7 +156,7 @@ async def vector_similarity_search(
     3. Returns raw results with similarity scores
     """
     try:
-        logger.info(f"Vector search query: {request.query[:100]}...")
+        logger.info("Vector search query: %.100s...", request.query)
         
         # Check if embedding services are available
         if not chroma_service.is_available():
@@ -89,8 +173,8 @@ async def vector_similarity_search(
         import time
         start_time = time.time()
         
-        # Convert company filter
-        company_filter = [c.value for c in request.company_filter] if request.company_filter else None
+        # Company filter symbols are already validated plain strings
+        company_filter = request.company_filter or None
         
         # Search for similar chunks
         chunks = chroma_service.search_similar_chunks(
@@ -100,10 +184,12 @@ async def vector_similarity_search(
             similarity_threshold=request.similarity_threshold or 0.5
         )
         
-        # Format results
+        # Format results; model_construct skips field validation, which is
+        # safe here because every value was just produced by our own search
+        # path (inbound request bodies still get full validation)
         results = []
         for chunk in chunks:
-            result = SearchResult(
+            result = SearchResult.model_construct(
                 document_id=chunk.get("document_id", "unknown"),
                 company=chunk.get("company", "Unknown"),
                 date=chunk.get("date", "Unknown"),
@@ -116,15 +202,18 @@ async def vector_similarity_search(
         end_time = time.time()
         processing_time = f"{end_time - start_time:.2f}s"
         
-        response = SearchResponse(
+        response = SearchResponse.model_construct(
             query=request.query,
             results=results,
             total_results=len(results),
             processing_time=processing_time
         )
-        
-        logger.info(f"Vector search completed: {len(results)} results in {processing_time}")
-        return response
+
+        logger.info("Vector search completed: %d results in %s", len(results), processing_time)
+        return Response(
+            content=response.model_dump_json(exclude_none=True),
+            media_type="application/json"
+        )
         
     except HTTPException:
         raise
@@ -155,7 +244,7 @@ async def generate_insights(
     4. Coverage statistics
     """
     try:
-        logger.info(f"Generating insights for topic: {topic}")
+        logger.info("Generating insights for topic: %s", topic)
         
         if not topic.strip():
             raise HTTPException(status_code=400, detail="Topic cannot be empty")
@@ -170,14 +259,14 @@ async def generate_insights(
                 date_range["end"] = date_end
         
         # Generate insights
-        insights = rag_pipeline.generate_insights(
+        insights = await rag_pipeline.generate_insights(
             topic=topic,
             companies=companies,
             date_range=date_range,
             max_sources=min(max_sources, 20)  # Limit max sources
         )
         
-        logger.info(f"Generated insights for topic: {topic}")
+        logger.info("Generated insights for topic: %s", topic)
         return insights
         
     except HTTPException:
@@ -1,8 +1,12 @@
 from pydantic_settings import BaseSettings
+from functools import lru_cache
 from typing import List
+import logging
 import os
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     """Application settings from environment variables"""
@@ -27,11 +31,41 @@ class Settings(BaseSettings):
     CHROMADB_PATH: str = "./data/chromadb"
     CHROMADB_HOST: str = "localhost"
     CHROMADB_PORT: int = 8000
+    # Store all transcripts in one collection keyed by company metadata,
+    # so multi-company searches are a single ANN pass instead of one per
+    # company. Off by default; existing per-company deployments keep
+    # working until data is re-ingested under the flag.
+    CHROMADB_SINGLE_COLLECTION: bool = False
+    # Mirror all embeddings into an in-process numpy matrix and answer
+    # searches with one exact BLAS scan instead of HNSW descent. Worth it
+    # for corpora up to a few hundred thousand chunks; costs RAM
+    # proportional to the corpus. Off by default.
+    SEARCH_INMEM_CACHE: bool = False
     
     # Embedding Configuration
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    # "cpu", "cuda", "mps", or "auto" to pick the best available device
+    # at model load
     EMBEDDING_DEVICE: str = "cpu"
+    # Run the encoder in half precision on CUDA; halves weight/activation
+    # bandwidth and cosine ranking is insensitive to the precision loss
+    EMBEDDING_FP16: bool = True
+    # Intra-op thread count for torch/MKL kernels; 0 picks
+    # min(cpu_count, 8) automatically. Pin to 1 when running several
+    # uvicorn workers per host to avoid thread oversubscription.
+    TORCH_NUM_THREADS: int = 0
+    EMBEDDING_BACKEND: str = "torch"  # "torch" or "onnx"
+    # With the onnx backend, dynamically quantize the exported graph to
+    # int8 (VNNI GEMMs, half the activation traffic). Worth enabling on
+    # CPU-only deployments; slight recall cost from the precision drop.
+    EMBEDDING_ONNX_INT8: bool = False
+    # On-disk dtype of the embedding cache matrix: "float32" or "float16".
+    # float16 halves cache size and read bandwidth; entries are cast back
+    # to float32 on load, and the ~3-decimal-digit precision is well within
+    # what cosine ranking tolerates.
+    EMBEDDING_CACHE_DTYPE: str = "float32"
     BATCH_SIZE: int = 32
+    MAX_BATCH: int = 128  # Cap for the /embeddings/batch endpoint
     
     # RAG Pipeline Settings
     MAX_CHUNKS_PER_QUERY: int = 5
@@ -66,15 +100,16 @@ class Settings(BaseSettings):
         
         for path in required_paths:
             if not path.exists():
-                print(f"Warning: Required path does not exist: {path}")
+                logger.warning("Required path does not exist: %s", path)
                 return False
         return True
 
 
-# Global settings instance
-settings = Settings()
-
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Dependency to get settings instance"""
-    return settings 
\ No newline at end of file
+    """Dependency to get the settings instance.
+
+    Cached so env parsing and validation run exactly once, and overridable
+    in tests via app.dependency_overrides.
+    """
+    return Settings()
\ No newline at end of file
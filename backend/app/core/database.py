@@ -1,6 +1,7 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from typing import Optional, List, Dict, Any
+from functools import lru_cache
 import logging
 from pathlib import Path
 
@@ -59,10 +60,16 @@ class ChromaDBManager:
                 collection = client.get_collection(collection_name)
                 logger.info(f"Retrieved existing collection: {collection_name}")
             except ValueError:
-                # Collection doesn't exist, create it
+                # Collection doesn't exist, create it. Embeddings are
+                # L2-normalized, so inner product equals cosine similarity
+                # while skipping the per-comparison norm work in HNSW scans.
+                # (Existing collections keep the space they were built with.)
                 collection = client.create_collection(
                     name=collection_name,
-                    metadata={"description": f"Financial transcripts for {collection_name}"}
+                    metadata={
+                        "description": f"Financial transcripts for {collection_name}",
+                        "hnsw:space": "ip"
+                    }
                 )
                 logger.info(f"Created new collection: {collection_name}")
             
@@ -83,6 +90,26 @@ class ChromaDBManager:
             logger.error(f"Failed to list collections: {e}")
             return []
     
+    def get_all_collection_infos(self) -> Dict[str, Dict[str, Any]]:
+        """Get name->info for every collection from one listing pass.
+
+        Caches the listed handles so later per-collection calls skip the
+        client lookup.
+        """
+        try:
+            infos = {}
+            for collection in self.get_client().list_collections():
+                self.collections[collection.name] = collection
+                infos[collection.name] = {
+                    "name": collection.name,
+                    "count": collection.count(),
+                    "metadata": collection.metadata or {}
+                }
+            return infos
+        except Exception as e:
+            logger.error(f"Failed to list collection infos: {e}")
+            return {}
+
     def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
         """Get information about a collection"""
         try:
@@ -114,6 +141,37 @@ class ChromaDBManager:
             logger.error(f"Failed to delete collection {collection_name}: {e}")
             return False
     
+    def backfill_quarter_metadata(self, collection_name: str) -> int:
+        """One-time migration: add the precomputed quarter to legacy chunk
+        metadata so the query path never has to parse dates"""
+        try:
+            # Local import to avoid a module-level cycle with the pipeline
+            from .rag_pipeline import _extract_quarter_cached
+
+            collection = self.get_or_create_collection(collection_name)
+            results = collection.get(include=["metadatas"])
+
+            ids = []
+            metadatas = []
+            for chunk_id, metadata in zip(results["ids"], results["metadatas"]):
+                if metadata.get("quarter"):
+                    continue
+                quarter = _extract_quarter_cached(metadata.get("date", ""))
+                if quarter is None:
+                    continue
+                metadata["quarter"] = quarter
+                ids.append(chunk_id)
+                metadatas.append(metadata)
+
+            if ids:
+                collection.update(ids=ids, metadatas=metadatas)
+                logger.info(f"Backfilled quarter metadata for {len(ids)} chunks in {collection_name}")
+            return len(ids)
+
+        except Exception as e:
+            logger.error(f"Failed to backfill quarter metadata for {collection_name}: {e}")
+            return 0
+
     def reset_database(self) -> bool:
         """Reset the entire database (use with caution)"""
         try:
@@ -127,10 +185,7 @@ class ChromaDBManager:
             return False
 
 
-# Global database manager instance
-db_manager = ChromaDBManager()
-
-
+@lru_cache(maxsize=1)
 def get_db_manager() -> ChromaDBManager:
-    """Dependency to get database manager instance"""
-    return db_manager 
\ No newline at end of file
+    """Dependency to get the database manager instance (created on first use)"""
+    return ChromaDBManager()
\ No newline at end of file
@@ -1,5 +1,8 @@
 from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+import asyncio
 import logging
+import re
 import time
 from datetime import datetime
 
@@ -12,26 +15,91 @@ from ..core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Precompiled fallback date patterns: Apr-2020 and 2020-Apr styles
+QUARTER_PATTERNS = [
+    (re.compile(r'(\w{3})-(\d{4})'), False),  # month first
+    (re.compile(r'(\d{4})-(\w{3})'), True),   # year first
+]
+
+MONTH_MAP = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4,
+    'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8,
+    'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+
+@lru_cache(maxsize=2048)
+def _extract_quarter_cached(date_str: str) -> Optional[str]:
+    """Extract quarter information from a date string (memoized).
+
+    Most retrieved chunks share a small set of dates, so caching collapses
+    per-chunk parsing to one parse per unique date string.
+    """
+    if not date_str:
+        return None
+
+    try:
+        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+        return f"Q{(date_obj.month - 1) // 3 + 1} {date_obj.year}"
+    except (ValueError, TypeError):
+        pass
+
+    # Fall back to filename-style patterns
+    for pattern, year_first in QUARTER_PATTERNS:
+        match = pattern.search(date_str)
+        if not match:
+            continue
+        try:
+            if year_first:
+                year_str, month_str = match.groups()
+            else:
+                month_str, year_str = match.groups()
+
+            month = MONTH_MAP.get(month_str, 1)
+            year = int(year_str)
+            return f"Q{(month - 1) // 3 + 1} {year}"
+        except (ValueError, KeyError):
+            continue
+
+    return None
+
 
 class RAGPipeline:
     """RAG Pipeline orchestrating retrieval and generation"""
     
+    # How long cached per-company chunk counts stay fresh; counts only
+    # change when embeddings are (re)built
+    CHUNK_COUNT_TTL = 60.0
+
     def __init__(self):
         self.settings = get_settings()
-        self.chroma_service = get_chroma_service()
-        self.gemini_service = get_gemini_service()
-        self.embedding_service = get_embedding_service()
+        self._company_count_cache: Dict[str, Tuple[float, int]] = {}
+
+    # Services resolve lazily through their cached getters so constructing
+    # the pipeline doesn't force torch/chromadb/genai imports up front
+    @property
+    def chroma_service(self):
+        return get_chroma_service()
+
+    @property
+    def gemini_service(self):
+        return get_gemini_service()
+
+    @property
+    def embedding_service(self):
+        return get_embedding_service()
     
     async def process_query(self, request: QueryRequest) -> QueryResponse:
         """Process a complete RAG query"""
-        start_time = time.time()
+        # Monotonic clock for the latency interval; immune to wall-clock jumps
+        start_time = time.monotonic()
         
         try:
-            logger.info(f"Processing RAG query: {request.question[:100]}...")
+            logger.info("Processing RAG query: %.100s...", request.question)
             
             # Extract parameters
             question = request.question
-            company_filter = [c.value for c in request.company_filter] if request.company_filter else None
+            company_filter = request.company_filter or None  # already plain symbols
             max_results = request.max_results
             similarity_threshold = request.similarity_threshold or self.settings.SIMILARITY_THRESHOLD
             temperature = request.temperature or self.settings.TEMPERATURE
@@ -45,21 +113,31 @@ class RAGPipeline:
                 if request.date_range.end:
                     date_filter["end"] = request.date_range.end
             
-            # Step 1: Retrieve similar chunks
+            # Step 1: Retrieve similar chunks. Both retrieval and generation
+            # are blocking (Chroma ANN search, Gemini HTTP call), so run them
+            # in the threadpool to keep the event loop free for other requests
             logger.info("Retrieving similar chunks from ChromaDB...")
-            similar_chunks = self.chroma_service.search_similar_chunks(
+
+            # Encode through the micro-batcher so concurrent queries share
+            # a single encoder forward pass
+            query_embedding = await self.embedding_service.encode_batched(question)
+
+            similar_chunks = await asyncio.to_thread(
+                self.chroma_service.search_similar_chunks,
                 query=question,
                 company_filter=company_filter,
                 max_results=max_results,
                 similarity_threshold=similarity_threshold,
-                date_filter=date_filter
+                date_filter=date_filter,
+                query_embedding=query_embedding
             )
-            
-            logger.info(f"Found {len(similar_chunks)} relevant chunks")
-            
-            # Step 2: Generate response
+
+            logger.info("Found %d relevant chunks", len(similar_chunks))
+
+            # Step 2: Generate response; the async Gemini call overlaps the
+            # network wait with other in-flight requests on the event loop
             logger.info("Generating response with Gemini Pro...")
-            generated_answer = self.gemini_service.generate_response(
+            generated_answer = await self.gemini_service.generate_response(
                 question=question,
                 sources=similar_chunks,
                 temperature=temperature
@@ -69,11 +147,10 @@ class RAGPipeline:
                 generated_answer = "I apologize, but I couldn't generate a response to your question. Please try rephrasing your question or check if the system is properly configured."
             
             # Step 3: Format sources
-            sources = self._format_sources(similar_chunks)
+            sources = self.format_sources(similar_chunks)
             
             # Step 4: Create metadata
-            end_time = time.time()
-            processing_time = f"{end_time - start_time:.2f}s"
+            processing_time = f"{time.monotonic() - start_time:.2f}s"
             
             metadata = QueryMetadata(
                 processing_time=processing_time,
@@ -85,22 +162,21 @@ class RAGPipeline:
             )
             
             # Step 5: Create response
-            response = QueryResponse(
+            response = QueryResponse.model_construct(
                 query=question,
                 answer=generated_answer,
                 sources=sources,
                 metadata=metadata
             )
             
-            logger.info(f"RAG query completed in {processing_time}")
+            logger.info("RAG query completed in %s", processing_time)
             return response
             
         except Exception as e:
             logger.error(f"RAG pipeline failed: {e}")
             
             # Return error response
-            end_time = time.time()
-            processing_time = f"{end_time - start_time:.2f}s"
+            processing_time = f"{time.monotonic() - start_time:.2f}s"
             
             metadata = QueryMetadata(
                 processing_time=processing_time,
@@ -111,23 +187,26 @@ class RAGPipeline:
                 max_results=max_results
             )
             
-            return QueryResponse(
+            return QueryResponse.model_construct(
                 query=question,
                 answer=f"An error occurred while processing your query: {str(e)}",
                 sources=[],
                 metadata=metadata
             )
     
-    def _format_sources(self, chunks: List[Dict[str, Any]]) -> List[SourceDocument]:
+    def format_sources(self, chunks: List[Dict[str, Any]]) -> List[SourceDocument]:
         """Format raw chunks into SourceDocument objects"""
         sources = []
         
         for chunk in chunks:
             try:
-                # Extract quarter from date if possible
-                quarter = self._extract_quarter(chunk.get("date", ""))
+                # Prefer the quarter precomputed at ingest; parse the date
+                # only for legacy rows without it
+                quarter = chunk.get("quarter") or self._extract_quarter(chunk.get("date", ""))
                 
-                source = SourceDocument(
+                # Values come straight from our own search results, so skip
+                # re-validating them on construction
+                source = SourceDocument.model_construct(
                     company=chunk.get("company", "Unknown"),
                     date=chunk.get("date", "Unknown"),
                     quarter=quarter,
@@ -144,67 +223,10 @@ class RAGPipeline:
         
         return sources
     
-    def _extract_quarter(self, date_str: str) -> Optional[str]:
+    @staticmethod
+    def _extract_quarter(date_str: str) -> Optional[str]:
         """Extract quarter information from date string"""
-        if not date_str:
-            return None
-        
-        try:
-            # Parse date and determine quarter
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            month = date_obj.month
-            year = date_obj.year
-            
-            if month in [1, 2, 3]:
-                return f"Q1 {year}"
-            elif month in [4, 5, 6]:
-                return f"Q2 {year}"
-            elif month in [7, 8, 9]:
-                return f"Q3 {year}"
-            else:
-                return f"Q4 {year}"
-                
-        except (ValueError, TypeError):
-            # If date parsing fails, try to extract from filename patterns
-            import re
-            
-            # Common patterns: Apr-2020, 2020-Apr-30, etc.
-            patterns = [
-                r'(\w{3})-(\d{4})',  # Apr-2020
-                r'(\d{4})-(\w{3})',  # 2020-Apr
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, date_str)
-                if match:
-                    try:
-                        if pattern.startswith(r'(\w{3})'):
-                            month_str, year_str = match.groups()
-                        else:
-                            year_str, month_str = match.groups()
-                        
-                        month_map = {
-                            'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4,
-                            'May': 5, 'Jun': 6, 'Jul': 7, 'Aug': 8,
-                            'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-                        }
-                        
-                        month = month_map.get(month_str, 1)
-                        year = int(year_str)
-                        
-                        if month in [1, 2, 3]:
-                            return f"Q1 {year}"
-                        elif month in [4, 5, 6]:
-                            return f"Q2 {year}"
-                        elif month in [7, 8, 9]:
-                            return f"Q3 {year}"
-                        else:
-                            return f"Q4 {year}"
-                            
-                    except (ValueError, KeyError):
-                        continue
-            
-            return None
+        return _extract_quarter_cached(date_str)
     
     def _estimate_total_chunks_searched(self, company_filter: Optional[List[str]]) -> int:
         """Estimate total number of chunks searched"""
@@ -212,20 +234,37 @@ class RAGPipeline:
             if company_filter:
                 companies = company_filter
             else:
-                companies = list(self.chroma_service.company_names.keys())
-            
-            total_chunks = 0
-            for company in companies:
-                stats = self.chroma_service.get_company_stats(company)
-                total_chunks += stats.get("chunk_count", 0)
-            
-            return total_chunks
-            
+                companies = self.chroma_service.company_tuple
+
+            # Serve counts from a short-lived cache; this is display-only
+            # metadata and stats calls are DB roundtrips. Any stale entry
+            # triggers one snapshot refresh for all companies instead of a
+            # per-company fan-out.
+            now = time.monotonic()
+            if any(
+                (cached := self._company_count_cache.get(company)) is None
+                or now - cached[0] >= self.CHUNK_COUNT_TTL
+                for company in companies
+            ):
+                counts = self.chroma_service.get_chunk_counts()
+                self._company_count_cache = {
+                    company: (now, count) for company, count in counts.items()
+                }
+
+            return sum(
+                self._company_count_cache.get(company, (now, 0))[1]
+                for company in companies
+            )
+
         except Exception as e:
             logger.warning(f"Failed to estimate chunks searched: {e}")
             return 0
+
+    def invalidate_chunk_counts(self) -> None:
+        """Drop cached chunk counts after embeddings are created or cleared"""
+        self._company_count_cache.clear()
     
-    def generate_insights(
+    async def generate_insights(
         self,
         topic: str,
         companies: Optional[List[str]] = None,
@@ -234,10 +273,11 @@ class RAGPipeline:
     ) -> Dict[str, Any]:
         """Generate insights on a specific topic"""
         try:
-            logger.info(f"Generating insights for topic: {topic}")
-            
+            logger.info("Generating insights for topic: %s", topic)
+
             # Search for relevant content
-            chunks = self.chroma_service.search_similar_chunks(
+            chunks = await asyncio.to_thread(
+                self.chroma_service.search_similar_chunks,
                 query=topic,
                 company_filter=companies,
                 max_results=max_sources,
@@ -254,15 +294,15 @@ class RAGPipeline:
                     "sources_count": 0
                 }
             
-            # Generate summary
-            summary = self.gemini_service.generate_summary(chunks, topic)
-            
-            # Extract key points
-            key_points = self.gemini_service.extract_key_points(chunks, max_points=5)
-            
-            # Analyze overall sentiment
+            # Summary, key points and sentiment are independent Gemini
+            # calls; gather overlaps their network waits so the endpoint
+            # pays one round-trip of latency instead of three
             combined_text = " ".join([chunk.get("content", "") for chunk in chunks[:3]])
-            sentiment = self.gemini_service.analyze_sentiment(combined_text)
+            summary, key_points, sentiment = await asyncio.gather(
+                self.gemini_service.generate_summary(chunks, topic),
+                self.gemini_service.extract_key_points(chunks, max_points=5),
+                self.gemini_service.analyze_sentiment(combined_text)
+            )
             
             return {
                 "topic": topic,
@@ -270,7 +310,7 @@ class RAGPipeline:
                 "key_points": key_points,
                 "sentiment": sentiment,
                 "sources_count": len(chunks),
-                "companies_covered": list(set(chunk.get("company", "") for chunk in chunks)),
+                "companies_covered": sorted({chunk.get("company") for chunk in chunks if chunk.get("company")}),
                 "date_range_covered": self._get_date_range_from_chunks(chunks)
             }
             
@@ -286,20 +326,21 @@ class RAGPipeline:
     
     def _get_date_range_from_chunks(self, chunks: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
         """Extract date range from chunks"""
-        dates = [chunk.get("date") for chunk in chunks if chunk.get("date")]
-        dates = [d for d in dates if d]  # Filter out None values
-        
-        if not dates:
-            return {"start": None, "end": None}
-        
-        dates.sort()
-        return {"start": dates[0], "end": dates[-1]}
-
+        # Single pass tracking min/max; no intermediate lists or sort
+        start = end = None
+        for chunk in chunks:
+            date = chunk.get("date")
+            if not date:
+                continue
+            if start is None or date < start:
+                start = date
+            if end is None or date > end:
+                end = date
 
-# Global RAG pipeline instance
-rag_pipeline = RAGPipeline()
+        return {"start": start, "end": end}
 
 
+@lru_cache(maxsize=1)
 def get_rag_pipeline() -> RAGPipeline:
-    """Dependency to get RAG pipeline instance"""
-    return rag_pipeline 
\ No newline at end of file
+    """Dependency to get the RAG pipeline instance (created on first use)"""
+    return RAGPipeline()
\ No newline at end of file
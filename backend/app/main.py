@@ -1,10 +1,11 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 
 from .core.config import get_settings
 from .api import query, embeddings, health
@@ -20,6 +21,37 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+def _warm_embedding_model() -> None:
+    """Load and warm the embedding model so the first query doesn't pay
+    load latency"""
+    try:
+        from .services.embedding_service import get_embedding_service
+        embedding_service = get_embedding_service()
+        if embedding_service.is_available():
+            embedding_service.warm_up()
+    except Exception as e:
+        logger.warning(f"Embedding model warmup failed: {e}")
+
+
+def _warm_chromadb() -> None:
+    """Initialize the ChromaDB client and pre-open per-company collections"""
+    try:
+        from .core.database import get_db_manager
+        from .services.chroma_service import get_chroma_service
+
+        db_manager = get_db_manager()
+        db_manager.get_client()
+
+        chroma_service = get_chroma_service()
+        for company in chroma_service.company_tuple:
+            db_manager.get_or_create_collection(
+                chroma_service.get_collection_name(company)
+            )
+        logger.info("ChromaDB client and collections initialized")
+    except Exception as e:
+        logger.warning(f"ChromaDB warmup failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
@@ -31,10 +63,25 @@ async def lifespan(app: FastAPI):
     # Validate paths
     if not settings.validate_paths():
         logger.warning("Some required paths are missing")
+
+    # Widen the default threadpool; query handlers offload blocking Chroma
+    # and Gemini calls to it, so its size caps concurrent in-flight queries
+    try:
+        import anyio.to_thread
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 64
+    except Exception as e:
+        logger.warning(f"Failed to resize default threadpool: {e}")
     
-    # Initialize services (lazy loading will handle actual initialization)
-    logger.info("Services initialized (lazy loading)")
-    
+    # Pay one-time costs (model load, Chroma client + index mmap) here
+    # instead of on the first query; run them concurrently so startup is
+    # bounded by the slowest component. Lazy paths remain as fallback.
+    await asyncio.gather(
+        asyncio.to_thread(_warm_embedding_model),
+        asyncio.to_thread(_warm_chromadb),
+    )
+
+    logger.info("Services initialized")
+
     yield
     
     # Shutdown
@@ -49,16 +96,19 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# Add CORS middleware
+# Add CORS middleware; explicit header whitelist plus a 24h preflight
+# cache so browsers skip the extra OPTIONS round-trip on repeat requests
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
 
@@ -66,10 +116,11 @@ app.add_middleware(
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Add processing time to response headers"""
-    start_time = time.time()
+    # perf_counter is the cheapest high-resolution clock; the f-string
+    # formats once without the round()+str() allocations
+    start_time = time.perf_counter()
     response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(round(process_time, 4))
+    response.headers["X-Process-Time"] = f"{(time.perf_counter() - start_time) * 1000:.2f}ms"
     return response
 
 
@@ -79,12 +130,12 @@ async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for unhandled errors"""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal Server Error",
             "message": "An unexpected error occurred. Please try again later.",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
             "path": str(request.url)
         }
     )
@@ -94,12 +145,12 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": f"HTTP {exc.status_code}",
             "message": exc.detail,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
             "path": str(request.url)
         }
     )
@@ -147,60 +198,75 @@ async def root():
         "docs_url": "/docs",
         "health_check": "/health",
         "api_prefix": settings.API_V1_PREFIX,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")
     }
 
 
+# Static /info payload, built once at import; nothing in it varies per request
+_INFO_PAYLOAD = {
+    "api": {
+        "name": settings.PROJECT_NAME,
+        "version": settings.VERSION,
+        "description": settings.DESCRIPTION
+    },
+    "endpoints": {
+        "query": f"{settings.API_V1_PREFIX}/query",
+        "search": f"{settings.API_V1_PREFIX}/search",
+        "insights": f"{settings.API_V1_PREFIX}/insights",
+        "companies": "/companies",
+        "health": "/health",
+        "embeddings_status": f"{settings.API_V1_PREFIX}/embeddings/status",
+        "embeddings_create": f"{settings.API_V1_PREFIX}/embeddings/create"
+    },
+    "features": [
+        "RAG-based Q&A on financial transcripts",
+        "Vector similarity search",
+        "Multi-company filtering",
+        "Date range filtering",
+        "Automated insight generation",
+        "Real-time embedding generation",
+        "Comprehensive health monitoring"
+    ],
+    "supported_companies": [
+        "AAPL", "AMD", "AMZN", "ASML", "CSCO",
+        "GOOGL", "INTC", "MSFT", "MU", "NVDA"
+    ],
+    "data_coverage": "2016-2020 earnings call transcripts",
+    "models": {
+        "embedding": settings.EMBEDDING_MODEL,
+        "llm": "Google Gemini Pro"
+    }
+}
+
+
 # API information endpoint
 @app.get("/info")
 async def api_info():
     """Detailed API information"""
-    return {
-        "api": {
-            "name": settings.PROJECT_NAME,
-            "version": settings.VERSION,
-            "description": settings.DESCRIPTION
-        },
-        "endpoints": {
-            "query": f"{settings.API_V1_PREFIX}/query",
-            "search": f"{settings.API_V1_PREFIX}/search",
-            "insights": f"{settings.API_V1_PREFIX}/insights",
-            "companies": "/companies",
-            "health": "/health",
-            "embeddings_status": f"{settings.API_V1_PREFIX}/embeddings/status",
-            "embeddings_create": f"{settings.API_V1_PREFIX}/embeddings/create"
-        },
-        "features": [
-            "RAG-based Q&A on financial transcripts",
-            "Vector similarity search",
-            "Multi-company filtering",
-            "Date range filtering",
-            "Automated insight generation",
-            "Real-time embedding generation",
-            "Comprehensive health monitoring"
-        ],
-        "supported_companies": [
-            "AAPL", "AMD", "AMZN", "ASML", "CSCO", 
-            "GOOGL", "INTC", "MSFT", "MU", "NVDA"
-        ],
-        "data_coverage": "2016-2020 earnings call transcripts",
-        "models": {
-            "embedding": settings.EMBEDDING_MODEL,
-            "llm": "Google Gemini Pro"
-        }
-    }
+    return _INFO_PAYLOAD
 
 
 # Startup message
 if __name__ == "__main__":
+    import os
     import uvicorn
-    
+
     logger.info(f"Starting server on {settings.BACKEND_HOST}:{settings.BACKEND_PORT}")
-    
+
+    # uvloop + httptools (bundled with uvicorn[standard]) cut per-request
+    # loop and parser overhead; reload is opt-in via DEV_RELOAD.
+    # WEB_CONCURRENCY defaults to 1: the ingest claim/status and the
+    # sqlite+memmap embedding cache are process-local, so extra workers
+    # break the /embeddings/create 409 guard and corrupt the cache —
+    # only raise it once that state is shared
+    dev_reload = bool(int(os.getenv("DEV_RELOAD", "0")))
     uvicorn.run(
         "app.main:app",
         host=settings.BACKEND_HOST,
         port=settings.BACKEND_PORT,
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        workers=1 if dev_reload else int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=dev_reload,
         log_level="info"
-    ) 
\ No newline at end of file
+    )
\ No newline at end of file
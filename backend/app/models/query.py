@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -18,6 +18,20 @@ class CompanySymbol(str, Enum):
     NVDA = "NVDA"
 
 
+# Frozen membership set; one hash lookup per symbol beats per-item Enum
+# coercion on hot request models
+_VALID_SYMBOLS = frozenset(CompanySymbol.__members__)
+
+
+def _validate_company_filter(v):
+    """Bulk-check company symbols against the valid set"""
+    if v is not None:
+        bad = set(v) - _VALID_SYMBOLS
+        if bad:
+            raise ValueError(f"Invalid company symbols: {sorted(bad)}")
+    return v
+
+
 class DateRange(BaseModel):
     """Date range filter for queries"""
     start: Optional[str] = Field(None, description="Start date (YYYY-MM-DD format)")
@@ -36,8 +50,8 @@ class DateRange(BaseModel):
 class QueryRequest(BaseModel):
     """Request model for RAG queries"""
     question: str = Field(..., min_length=1, max_length=1000, description="User question about financial transcripts")
-    company_filter: Optional[List[CompanySymbol]] = Field(
-        None, 
+    company_filter: Optional[List[str]] = Field(
+        None,
         description="Filter results by specific companies",
         example=["AAPL", "MSFT"]
     )
@@ -55,9 +69,10 @@ class QueryRequest(BaseModel):
         le=2.0,
         description="LLM temperature for response generation (0.0-2.0)"
     )
-    
-    class Config:
-        schema_extra = {
+
+    _check_companies = validator('company_filter', allow_reuse=True)(_validate_company_filter)
+
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "question": "What were Apple's main concerns about supply chain in 2020?",
                 "company_filter": ["AAPL"],
@@ -70,17 +85,19 @@ class QueryRequest(BaseModel):
                 "temperature": 0.7
             }
         }
+    )
 
 
 class SearchRequest(BaseModel):
     """Request model for direct vector similarity search"""
     query: str = Field(..., min_length=1, max_length=1000, description="Search query")
-    company_filter: Optional[List[CompanySymbol]] = Field(None, description="Filter by companies")
+    company_filter: Optional[List[str]] = Field(None, description="Filter by companies")
     max_results: int = Field(10, ge=1, le=50, description="Maximum number of results")
     similarity_threshold: Optional[float] = Field(None, ge=0.0, le=1.0, description="Minimum similarity score")
-    
-    class Config:
-        schema_extra = {
+
+    _check_companies = validator('company_filter', allow_reuse=True)(_validate_company_filter)
+
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "query": "revenue growth cloud services",
                 "company_filter": ["MSFT", "AMZN"],
@@ -88,6 +105,24 @@ class SearchRequest(BaseModel):
                 "similarity_threshold": 0.6
             }
         }
+    )
+
+
+class BatchEmbeddingRequest(BaseModel):
+    """Request model for encoding a batch of texts in one pass"""
+    texts: List[str] = Field(..., min_length=1, description="Texts to encode")
+    normalize: bool = Field(True, description="L2-normalize the returned embeddings")
+
+    model_config = ConfigDict(json_schema_extra={
+            "example": {
+                "texts": [
+                    "cloud computing revenue growth",
+                    "supply chain constraints"
+                ],
+                "normalize": True
+            }
+        }
+    )
 
 
 class EmbeddingRequest(BaseModel):
@@ -96,11 +131,11 @@ class EmbeddingRequest(BaseModel):
     companies: Optional[List[CompanySymbol]] = Field(None, description="Process specific companies only")
     batch_size: int = Field(32, ge=1, le=100, description="Batch size for processing")
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "force_recreate": False,
                 "companies": ["AAPL", "MSFT"],
                 "batch_size": 32
             }
-        } 
\ No newline at end of file
+        }
+    )
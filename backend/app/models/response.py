@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List, Optional, Dict, Any
+from typing_extensions import TypedDict
 from datetime import datetime
 
 
@@ -12,9 +13,13 @@ class SourceDocument(BaseModel):
     similarity_score: float = Field(..., ge=0.0, le=1.0, description="Similarity score (0.0-1.0)")
     document_id: str = Field(..., description="Unique document identifier")
     chunk_index: Optional[int] = Field(None, description="Index of chunk within document")
-    
-    class Config:
-        schema_extra = {
+
+    # frozen avoids the per-instance mutable-state overhead on result rows
+    # built in bulk; extra='ignore' skips the __pydantic_extra__ allocation
+    model_config = ConfigDict(
+        extra='ignore',
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "company": "AAPL",
                 "date": "2020-07-30",
@@ -25,28 +30,23 @@ class SourceDocument(BaseModel):
                 "chunk_index": 5
             }
         }
+    )
 
 
-class QueryMetadata(BaseModel):
-    """Metadata about query processing"""
-    processing_time: str = Field(..., description="Time taken to process query")
-    total_chunks_searched: int = Field(..., description="Total number of chunks searched")
-    model_used: str = Field(..., description="Embedding model used")
-    llm_model: str = Field(..., description="LLM model used for generation")
-    similarity_threshold: float = Field(..., description="Similarity threshold applied")
-    max_results: int = Field(..., description="Maximum results requested")
-    
-    class Config:
-        schema_extra = {
-            "example": {
-                "processing_time": "1.2s",
-                "total_chunks_searched": 1250,
-                "model_used": "all-MiniLM-L6-v2",
-                "llm_model": "gemini-pro",
-                "similarity_threshold": 0.7,
-                "max_results": 5
-            }
-        }
+class QueryMetadata(TypedDict):
+    """Metadata about query processing.
+
+    TypedDict rather than a nested BaseModel: the values are produced
+    internally and never re-validated, so plain-dict construction skips
+    the per-instance model machinery while FastAPI still derives the
+    schema from the annotations.
+    """
+    processing_time: str
+    total_chunks_searched: int
+    model_used: str
+    llm_model: str
+    similarity_threshold: float
+    max_results: int
 
 
 class QueryResponse(BaseModel):
@@ -55,9 +55,8 @@ class QueryResponse(BaseModel):
     answer: str = Field(..., description="Generated answer based on retrieved context")
     sources: List[SourceDocument] = Field([], description="Relevant source documents")
     metadata: QueryMetadata = Field(..., description="Query processing metadata")
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "query": "What were Apple's main concerns about supply chain in 2020?",
                 "answer": "Based on Apple's 2020 earnings calls, the main supply chain concerns were...",
@@ -82,6 +81,7 @@ class QueryResponse(BaseModel):
                 }
             }
         }
+    )
 
 
 class SearchResult(BaseModel):
@@ -93,6 +93,8 @@ class SearchResult(BaseModel):
     similarity_score: float = Field(..., ge=0.0, le=1.0, description="Similarity score")
     metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
 
+    model_config = ConfigDict(extra='ignore', frozen=True)
+
 
 class SearchResponse(BaseModel):
     """Response model for vector similarity search"""
@@ -100,9 +102,8 @@ class SearchResponse(BaseModel):
     results: List[SearchResult] = Field([], description="Search results")
     total_results: int = Field(..., description="Total number of results found")
     processing_time: str = Field(..., description="Time taken to process search")
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "query": "revenue growth cloud services",
                 "results": [
@@ -119,6 +120,13 @@ class SearchResponse(BaseModel):
                 "processing_time": "0.8s"
             }
         }
+    )
+
+
+class DateRange(TypedDict):
+    """Available date bounds for a company's transcripts"""
+    start: Optional[str]
+    end: Optional[str]
 
 
 class CompanyInfo(BaseModel):
@@ -126,11 +134,13 @@ class CompanyInfo(BaseModel):
     symbol: str = Field(..., description="Company symbol")
     name: str = Field(..., description="Company full name")
     transcript_count: int = Field(..., description="Number of available transcripts")
-    date_range: Dict[str, str] = Field(..., description="Available date range")
+    date_range: DateRange = Field(..., description="Available date range")
     latest_transcript: Optional[str] = Field(None, description="Date of latest transcript")
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(
+        extra='ignore',
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "symbol": "AAPL",
                 "name": "Apple Inc.",
@@ -139,6 +149,7 @@ class CompanyInfo(BaseModel):
                 "latest_transcript": "2020-07-30"
             }
         }
+    )
 
 
 class CompaniesResponse(BaseModel):
@@ -146,9 +157,8 @@ class CompaniesResponse(BaseModel):
     companies: List[CompanyInfo] = Field(..., description="List of available companies")
     total_companies: int = Field(..., description="Total number of companies")
     total_transcripts: int = Field(..., description="Total number of transcripts")
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "companies": [
                     {
@@ -163,6 +173,7 @@ class CompaniesResponse(BaseModel):
                 "total_transcripts": 187
             }
         }
+    )
 
 
 class HealthResponse(BaseModel):
@@ -172,9 +183,8 @@ class HealthResponse(BaseModel):
     version: str = Field(..., description="API version")
     database_status: str = Field(..., description="Database connection status")
     embeddings_status: str = Field(..., description="Embedding model status")
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "status": "healthy",
                 "timestamp": "2023-12-01T12:00:00Z",
@@ -183,28 +193,22 @@ class HealthResponse(BaseModel):
                 "embeddings_status": "loaded"
             }
         }
+    )
 
 
-class EmbeddingStatus(BaseModel):
-    """Status of embedding generation"""
-    status: str = Field(..., description="Current status")
-    progress: Optional[float] = Field(None, description="Progress percentage (0-100)")
-    total_documents: Optional[int] = Field(None, description="Total documents to process")
-    processed_documents: Optional[int] = Field(None, description="Documents processed")
-    current_company: Optional[str] = Field(None, description="Currently processing company")
-    estimated_time_remaining: Optional[str] = Field(None, description="Estimated time remaining")
-    
-    class Config:
-        schema_extra = {
-            "example": {
-                "status": "processing",
-                "progress": 45.5,
-                "total_documents": 187,
-                "processed_documents": 85,
-                "current_company": "AAPL",
-                "estimated_time_remaining": "5m 30s"
-            }
-        }
+class EmbeddingStatus(TypedDict):
+    """Status of embedding generation.
+
+    TypedDict for the same reason as QueryMetadata: the polled /status
+    endpoint copies trusted internal state, so it shouldn't pay model
+    construction and validation on every poll.
+    """
+    status: str
+    progress: Optional[float]
+    total_documents: Optional[int]
+    processed_documents: Optional[int]
+    current_company: Optional[str]
+    estimated_time_remaining: Optional[str]
 
 
 class ErrorResponse(BaseModel):
@@ -212,12 +216,17 @@ class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error type")
     message: str = Field(..., description="Error message")
     details: Optional[Dict[str, Any]] = Field(None, description="Additional error details")
-    
-    class Config:
-        schema_extra = {
+
+    model_config = ConfigDict(json_schema_extra={
             "example": {
                 "error": "ValidationError",
                 "message": "Invalid company symbol provided",
                 "details": {"invalid_symbols": ["INVALID"]}
             }
-        } 
\ No newline at end of file
+        }
+    )
+
+
+# Precompiled adapter for the hot source list; built once at import so
+# standalone serialization of the list never rebuilds the core schema
+SOURCES_ADAPTER = TypeAdapter(List[SourceDocument])
@@ -1,187 +1,796 @@
 import chromadb
 from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+import heapq
+import json
 import logging
+import sys
+import threading
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 import re
 
+import numpy as np
+
+from ..core.config import get_settings
 from ..core.database import get_db_manager
 from ..services.embedding_service import get_embedding_service
 from ..models.query import CompanySymbol
 
 logger = logging.getLogger(__name__)
 
+# Pool for fanning out per-company collection queries; searches over
+# disjoint collections are independent, so they run concurrently
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chroma-search")
+
+_EPOCH = date(1970, 1, 1)
+
+# Static company universe as module-level constants: tuple iteration for
+# the default search set, a frozenset for membership, and a precomputed
+# symbol->index map backing the packed int8 codes in the scan mirror
+COMPANY_NAMES: Dict[str, str] = {
+    "AAPL": "Apple Inc.",
+    "AMD": "Advanced Micro Devices Inc.",
+    "AMZN": "Amazon.com Inc.",
+    "ASML": "ASML Holding N.V.",
+    "CSCO": "Cisco Systems Inc.",
+    "GOOGL": "Alphabet Inc.",
+    "INTC": "Intel Corporation",
+    "MSFT": "Microsoft Corporation",
+    "MU": "Micron Technology Inc.",
+    "NVDA": "NVIDIA Corporation"
+}
+COMPANY_SYMBOLS: Tuple[str, ...] = tuple(COMPANY_NAMES)
+COMPANY_SET = frozenset(COMPANY_NAMES)
+SYMBOL_IDX: Dict[str, int] = {s: i for i, s in enumerate(COMPANY_SYMBOLS)}
+
+# Interned per-chunk metadata keys: one shared string object (and one
+# cached hash) across every chunk dict built at ingest
+_KEY_CHUNK_INDEX = sys.intern("chunk_index")
+_KEY_DOCUMENT_ID = sys.intern("document_id")
+_KEY_COMPANY = sys.intern("company")
+_KEY_TOTAL_CHUNKS = sys.intern("total_chunks")
+
+
+@lru_cache(maxsize=2048)
+def _date_to_days(date_str: str) -> int:
+    """Days since epoch for an ISO date string; -1 when missing or unparseable.
+
+    Few unique dates exist across the corpus, so the cache collapses
+    parsing to one call per distinct string.
+    """
+    if not date_str:
+        return -1
+    try:
+        return (date.fromisoformat(date_str) - _EPOCH).days
+    except ValueError:
+        return -1
+
 
 class ChromaService:
     """Service for ChromaDB vector database operations"""
     
+    # Collection name used when all companies share one collection
+    UNIFIED_COLLECTION = "transcripts"
+
+    # Semantic result cache: queries whose embeddings land within this
+    # cosine distance of a cached one (same filters) reuse its results
+    PROX_CACHE_SIZE = 256
+    PROX_TAU = 0.05
+
     def __init__(self):
+        self.settings = get_settings()
         self.db_manager = get_db_manager()
         self.embedding_service = get_embedding_service()
+        self.single_collection = self.settings.CHROMADB_SINGLE_COLLECTION
         
         # Check if embedding service is available
         self.embeddings_available = self.embedding_service.is_available()
         if not self.embeddings_available:
             logger.warning("Embedding service is not available. Vector operations will be disabled.")
         
-        # Company name mapping
-        self.company_names = {
-            "AAPL": "Apple Inc.",
-            "AMD": "Advanced Micro Devices Inc.",
-            "AMZN": "Amazon.com Inc.",
-            "ASML": "ASML Holding N.V.",
-            "CSCO": "Cisco Systems Inc.",
-            "GOOGL": "Alphabet Inc.",
-            "INTC": "Intel Corporation",
-            "MSFT": "Microsoft Corporation",
-            "MU": "Micron Technology Inc.",
-            "NVDA": "NVIDIA Corporation"
-        }
-    
+        # Instance aliases of the module constants, kept for the existing
+        # call sites (API routes, pipeline) that reach them through the
+        # service
+        self.company_names = COMPANY_NAMES
+        self.company_tuple = COMPANY_SYMBOLS
+        self.company_set = COMPANY_SET
+
+        # Per-company aggregates (doc ids, chunk count, date bounds) kept
+        # up to date at ingest so stats reads don't scan collection
+        # metadata; persisted to a sidecar so restarts keep O(1) stats
+        self._stats_path = Path(self.settings.DATA_PATH) / "collection_stats.json"
+        self._stats_cache: Dict[str, Dict[str, Any]] = self._load_stats_cache()
+
+        # LRU list of (embedding, filters_key, results); oldest first
+        self._prox_cache: List[Tuple[np.ndarray, tuple, List[Dict[str, Any]]]] = []
+        self._prox_lock = threading.Lock()
+
+        # Resolved collection handles keyed by company symbol, so the hot
+        # paths skip the manager's lookup-and-lock on every call. Filled
+        # lazily (first touch / warmup) and invalidated on delete.
+        self._collections: Dict[str, Any] = {}
+
+        # Optional in-process mirror of all embeddings: one (N, d) fp32
+        # matrix with parallel metadata/document columns plus packed
+        # int8 company codes and int32 days-since-epoch dates, so filter
+        # masks are single SIMD comparisons rather than per-row dict
+        # lookups and string compares. Built lazily on first search,
+        # extended at ingest, dropped on delete.
+        self.inmem_scan = self.settings.SEARCH_INMEM_CACHE
+        self._company_code = SYMBOL_IDX
+        self._emb_matrix: Optional[np.ndarray] = None
+        self._emb_meta: List[Dict[str, Any]] = []
+        self._emb_docs: List[str] = []
+        self._emb_company: Optional[np.ndarray] = None
+        self._emb_date: Optional[np.ndarray] = None
+        self._emb_lock = threading.Lock()
+
     def is_available(self) -> bool:
         """Check if ChromaDB service with embeddings is available"""
         return self.embeddings_available
     
     def get_collection_name(self, company: str) -> str:
         """Get standardized collection name for company"""
+        if self.single_collection:
+            return self.UNIFIED_COLLECTION
         return f"transcripts_{company.lower()}"
+
+    def _get_collection(self, company: str):
+        """Get the cached collection handle for a company"""
+        collection = self._collections.get(company)
+        if collection is None:
+            collection = self.db_manager.get_or_create_collection(
+                self.get_collection_name(company)
+            )
+            self._collections[company] = collection
+        return collection
+
+    def _load_stats_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Load the persisted per-company stats aggregates, if present"""
+        try:
+            with open(self._stats_path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            return {
+                company: {
+                    "documents": set(entry["documents"]),
+                    "chunk_count": entry["chunk_count"],
+                    "date_min": entry.get("date_min"),
+                    "date_max": entry.get("date_max")
+                }
+                for company, entry in raw.items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _persist_stats_cache(self) -> None:
+        """Write the stats aggregates to the sidecar file"""
+        try:
+            self._stats_path.parent.mkdir(parents=True, exist_ok=True)
+            serializable = {
+                company: {
+                    "documents": sorted(entry["documents"]),
+                    "chunk_count": entry["chunk_count"],
+                    "date_min": entry.get("date_min"),
+                    "date_max": entry.get("date_max")
+                }
+                for company, entry in self._stats_cache.items()
+            }
+            with open(self._stats_path, 'w', encoding='utf-8') as f:
+                json.dump(serializable, f)
+        except OSError as e:
+            logger.warning(f"Failed to persist stats cache: {e}")
+
+    def _record_ingest(self, company: str, document_ids: List[str], chunk_count: int, dates: List[str]) -> None:
+        """Fold newly stored chunks into the company's stats aggregates"""
+        entry = self._stats_cache.setdefault(company, {
+            "documents": set(),
+            "chunk_count": 0,
+            "date_min": None,
+            "date_max": None
+        })
+        entry["documents"].update(document_ids)
+        entry["chunk_count"] += chunk_count
+        self._prox_invalidate()
+        for date in dates:
+            if not date:
+                continue
+            if entry["date_min"] is None or date < entry["date_min"]:
+                entry["date_min"] = date
+            if entry["date_max"] is None or date > entry["date_max"]:
+                entry["date_max"] = date
+        self._persist_stats_cache()
+
+    @staticmethod
+    def build_chunk_metadatas(
+        metadata: Dict[str, Any],
+        document_id: str,
+        company: str,
+        total_chunks: int
+    ) -> List[Dict[str, Any]]:
+        """Build per-chunk metadata dicts from one shared template"""
+        template = {
+            **metadata,
+            _KEY_DOCUMENT_ID: document_id,
+            _KEY_COMPANY: company,
+            _KEY_TOTAL_CHUNKS: total_chunks
+        }
+        metadatas = []
+        for i in range(total_chunks):
+            m = template.copy()
+            m[_KEY_CHUNK_INDEX] = i
+            metadatas.append(m)
+        return metadatas
+
+    @staticmethod
+    def make_chunk_ids(document_id: str, count: int) -> List[str]:
+        """Build the chunk IDs for a document in one comprehension"""
+        prefix = document_id + "_chunk_"
+        return [prefix + str(i) for i in range(count)]
     
     def store_document_chunks(
         self, 
         company: str, 
         document_id: str, 
-        chunks: List[str], 
-        metadata: Dict[str, Any]
+        chunks: List[str],
+        metadata: Dict[str, Any],
+        embeddings: Optional[Any] = None
     ) -> bool:
-        """Store document chunks in ChromaDB"""
+        """Store document chunks in ChromaDB, encoding them unless precomputed
+        embeddings are provided"""
         try:
-            collection_name = self.get_collection_name(company)
-            collection = self.db_manager.get_or_create_collection(collection_name)
-            
-            # Generate embeddings for chunks
-            logger.info(f"Generating embeddings for {len(chunks)} chunks from {document_id}")
-            embeddings = self.embedding_service.encode_texts(chunks)
-            
-            # Prepare data for ChromaDB
-            ids = []
-            documents = []
-            metadatas = []
-            embeddings_list = []
-            
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                chunk_id = f"{document_id}_chunk_{i}"
-                chunk_metadata = {
-                    **metadata,
-                    "chunk_index": i,
-                    "document_id": document_id,
-                    "company": company,
-                    "total_chunks": len(chunks)
-                }
-                
-                ids.append(chunk_id)
-                documents.append(chunk)
-                metadatas.append(chunk_metadata)
-                embeddings_list.append(embedding.tolist())
+            collection = self._get_collection(company)
+
+            if embeddings is None:
+                # Generate embeddings for chunks
+                logger.info(f"Generating embeddings for {len(chunks)} chunks from {document_id}")
+                embeddings = self.embedding_service.encode_texts(chunks)
             
-            # Store in ChromaDB
+            # Prepare data for ChromaDB. Splat the caller metadata once
+            # into a template, then per chunk only copy and set the index
+            ids = self.make_chunk_ids(document_id, len(chunks))
+            documents = list(chunks)
+            metadatas = self.build_chunk_metadatas(
+                metadata, document_id, company, len(chunks)
+            )
+
+            # Store in ChromaDB; the pinned chromadb 0.4.15 validates
+            # embeddings as plain lists of lists and rejects ndarrays, so
+            # convert at the client boundary (the in-memory mirror below
+            # keeps the array)
             collection.add(
                 ids=ids,
                 documents=documents,
-                embeddings=embeddings_list,
+                embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
                 metadatas=metadatas
             )
             
-            logger.info(f"Stored {len(chunks)} chunks for document {document_id} in collection {collection_name}")
+            logger.info(f"Stored {len(chunks)} chunks for document {document_id} in collection {collection.name}")
+            self._emb_append(embeddings, metadatas, documents)
+            self._record_ingest(company, [document_id], len(chunks), [metadata.get("date", "")])
             return True
             
         except Exception as e:
             logger.error(f"Failed to store document chunks: {e}")
             return False
     
+    def store_documents_batch(
+        self,
+        items: List[Tuple[str, str, List[str], Dict[str, Any]]]
+    ) -> bool:
+        """Encode and store many documents' chunks in one encoder pass.
+
+        Takes (company, document_id, chunks, metadata) tuples, flattens the
+        chunks across documents into a single encode_texts call, then issues
+        one bulk add per target collection — instead of one encoder pass and
+        one add per document.
+        """
+        if not items:
+            return True
+
+        try:
+            all_chunks = list(chain.from_iterable(item[2] for item in items))
+            embeddings = self.embedding_service.encode_texts(all_chunks, show_progress=False)
+
+            # Slice embeddings back to per-document groups and bucket the
+            # payloads per company so each collection gets one add
+            grouped: Dict[str, Dict[str, list]] = {}
+            offset = 0
+            for company, document_id, chunks, metadata in items:
+                doc_embeddings = embeddings[offset:offset + len(chunks)]
+                offset += len(chunks)
+
+                bucket = grouped.setdefault(company, {
+                    "ids": [], "documents": [], "metadatas": [], "embeddings": []
+                })
+                bucket["ids"].extend(self.make_chunk_ids(document_id, len(chunks)))
+                bucket["documents"].extend(chunks)
+                bucket["metadatas"].extend(
+                    self.build_chunk_metadatas(metadata, document_id, company, len(chunks))
+                )
+                bucket["embeddings"].append(doc_embeddings)
+
+            success = True
+            for company, bucket in grouped.items():
+                success &= self.add_bulk(
+                    company=company,
+                    ids=bucket["ids"],
+                    embeddings=np.concatenate(bucket["embeddings"]).astype(np.float32, copy=False),
+                    metadatas=bucket["metadatas"],
+                    documents=bucket["documents"]
+                )
+            return success
+
+        except Exception as e:
+            logger.error(f"Failed to store document batch: {e}")
+            return False
+
+    def add_bulk(
+        self,
+        company: str,
+        ids: List[str],
+        embeddings: Any,
+        metadatas: List[Dict[str, Any]],
+        documents: List[str]
+    ) -> bool:
+        """Add many chunks to a company's collection in a single call"""
+        try:
+            collection = self._get_collection(company)
+
+            # chromadb 0.4.15 rejects ndarrays; hand the client plain
+            # lists and keep the array for the in-memory mirror
+            collection.add(
+                ids=ids,
+                documents=documents,
+                embeddings=np.asarray(embeddings, dtype=np.float32).tolist(),
+                metadatas=metadatas
+            )
+
+            logger.info(f"Bulk-added {len(ids)} chunks to collection {collection.name}")
+            self._emb_append(embeddings, metadatas, documents)
+            self._record_ingest(
+                company,
+                list({m.get("document_id", "") for m in metadatas} - {""}),
+                len(ids),
+                [m.get("date", "") for m in metadatas]
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to bulk-add chunks for {company}: {e}")
+            return False
+
     def search_similar_chunks(
         self,
         query: str,
         company_filter: Optional[List[str]] = None,
         max_results: int = 5,
         similarity_threshold: float = 0.7,
-        date_filter: Optional[Dict[str, str]] = None
+        date_filter: Optional[Dict[str, str]] = None,
+        query_embedding: Optional[Any] = None
     ) -> List[Dict[str, Any]]:
-        """Search for similar chunks across companies"""
+        """Search for similar chunks across companies.
+
+        Accepts a precomputed query embedding (e.g. from the async
+        micro-batcher) so callers that already encoded the query don't pay
+        a second forward pass.
+        """
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_service.encode_single_text(query)
-            
-            all_results = []
-            companies_to_search = company_filter or list(self.company_names.keys())
-            
-            for company in companies_to_search:
-                try:
-                    collection_name = self.get_collection_name(company)
-                    collection = self.db_manager.get_or_create_collection(collection_name)
-                    
-                    # Check if collection has documents
+            # Generate query embedding once (LRU-cached for repeated
+            # questions)
+            if query_embedding is None:
+                query_embedding = self.embedding_service.encode_query(query)
+            query_vector = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+
+            companies_to_search = company_filter or self.company_tuple
+
+            # Semantic cache: a near-identical query with the same filters
+            # reuses the cached top-k and skips the ANN search entirely
+            filters_key = (
+                tuple(sorted(companies_to_search)),
+                date_filter.get("start") if date_filter else None,
+                date_filter.get("end") if date_filter else None,
+                max_results,
+                similarity_threshold
+            )
+            cached_results = self._prox_lookup(query_embedding, filters_key)
+            if cached_results is not None:
+                return cached_results
+
+            # Exact in-memory path: one BLAS pass over the mirrored
+            # matrix replaces every collection query
+            if self.inmem_scan and self._ensure_emb_cache():
+                inmem_results = self._search_inmem(
+                    query_embedding, companies_to_search,
+                    max_results, similarity_threshold, date_filter
+                )
+                self._prox_store(query_embedding, filters_key, inmem_results)
+                return inmem_results
+
+            # With the unified collection, all companies are answered by a
+            # single ANN descent with a metadata pushdown
+            if self.single_collection:
+                unified_results = self._search_unified(
+                    companies_to_search, query_vector,
+                    max_results, similarity_threshold, date_filter
+                )
+                self._prox_store(query_embedding, filters_key, unified_results)
+                return unified_results
+
+            # Per-company collections are disjoint, so fan the queries out
+            # across the search pool and merge; a single company skips the
+            # pool dispatch entirely
+            if len(companies_to_search) == 1:
+                all_results = self._search_company(
+                    companies_to_search[0], query_vector,
+                    max_results, similarity_threshold, date_filter
+                )
+            else:
+                all_results = []
+                futures = [
+                    _search_pool.submit(
+                        self._search_company, company, query_vector,
+                        max_results, similarity_threshold, date_filter
+                    )
+                    for company in companies_to_search
+                ]
+                for future in futures:
+                    all_results.extend(future.result())
+
+            # Top-k merge across companies by similarity score
+            final_results = heapq.nlargest(
+                max_results, all_results, key=lambda x: x["similarity_score"]
+            )
+            self._prox_store(query_embedding, filters_key, final_results)
+            return final_results
+
+        except Exception as e:
+            logger.error(f"Failed to search similar chunks: {e}")
+            return []
+
+    def _prox_lookup(self, query_embedding, filters_key: tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for a semantically near query, if any.
+
+        Embeddings are L2-normalized, so one vectorized dot product against
+        the stacked cache keys gives cosine similarity to every entry.
+        """
+        with self._prox_lock:
+            candidates = [
+                (i, entry) for i, entry in enumerate(self._prox_cache)
+                if entry[1] == filters_key
+            ]
+            if not candidates:
+                return None
+
+            keys = np.stack([entry[0] for _, entry in candidates])
+            sims = keys @ np.asarray(query_embedding, dtype=np.float32)
+            best = int(np.argmax(sims))
+            if 1.0 - float(sims[best]) <= self.PROX_TAU:
+                index, entry = candidates[best]
+                # Refresh the hit's LRU position
+                self._prox_cache.append(self._prox_cache.pop(index))
+                return entry[2]
+        return None
+
+    def _prox_store(self, query_embedding, filters_key: tuple, results: List[Dict[str, Any]]) -> None:
+        """Add a query's results to the semantic cache, evicting the oldest"""
+        if not results:
+            return
+        with self._prox_lock:
+            self._prox_cache.append(
+                (np.asarray(query_embedding, dtype=np.float32), filters_key, results)
+            )
+            if len(self._prox_cache) > self.PROX_CACHE_SIZE:
+                self._prox_cache.pop(0)
+
+    def _prox_invalidate(self) -> None:
+        """Drop cached results after the underlying data changes"""
+        with self._prox_lock:
+            self._prox_cache.clear()
+
+    def _ensure_emb_cache(self) -> bool:
+        """Build the in-memory embedding mirror on first use"""
+        if self._emb_matrix is not None:
+            return True
+        with self._emb_lock:
+            if self._emb_matrix is not None:
+                return True
+            try:
+                matrices = []
+                metas: List[Dict[str, Any]] = []
+                docs: List[str] = []
+                targets = (
+                    [self.UNIFIED_COLLECTION] if self.single_collection
+                    else [self.get_collection_name(c) for c in self.company_tuple]
+                )
+                for name in targets:
+                    collection = self.db_manager.get_or_create_collection(name)
                     if collection.count() == 0:
-                        logger.warning(f"Collection {collection_name} is empty")
                         continue
-                    
-                    # Prepare where clause for filtering
-                    where_clause = {"company": company}
-                    
-                    # Add date filtering if specified
-                    if date_filter:
-                        if date_filter.get("start"):
-                            where_clause["date"] = {"$gte": date_filter["start"]}
-                        if date_filter.get("end"):
-                            if "date" not in where_clause:
-                                where_clause["date"] = {}
-                            where_clause["date"]["$lte"] = date_filter["end"]
-                    
-                    # Search in collection
-                    results = collection.query(
-                        query_embeddings=[query_embedding.tolist()],
-                        n_results=min(max_results * 2, 50),  # Get more results to filter
-                        where=where_clause,
-                        include=["documents", "metadatas", "distances"]
-                    )
-                    
-                    # Process results
-                    if results["documents"] and results["documents"][0]:
-                        for i, (doc, metadata, distance) in enumerate(zip(
-                            results["documents"][0],
-                            results["metadatas"][0],
-                            results["distances"][0]
-                        )):
-                            # Convert distance to similarity score
-                            similarity_score = 1 - distance
-                            
-                            if similarity_score >= similarity_threshold:
-                                result = {
-                                    "company": company,
-                                    "document_id": metadata.get("document_id", ""),
-                                    "chunk_index": metadata.get("chunk_index", 0),
-                                    "date": metadata.get("date", ""),
-                                    "quarter": metadata.get("quarter", ""),
-                                    "content": doc,
-                                    "similarity_score": similarity_score,
-                                    "metadata": metadata
-                                }
-                                all_results.append(result)
-                
-                except Exception as e:
-                    logger.warning(f"Failed to search in collection for {company}: {e}")
-                    continue
-            
-            # Sort by similarity score and limit results
-            all_results.sort(key=lambda x: x["similarity_score"], reverse=True)
+                    data = collection.get(include=["embeddings", "documents", "metadatas"])
+                    if not data["ids"]:
+                        continue
+                    matrices.append(np.asarray(data["embeddings"], dtype=np.float32))
+                    metas.extend(data["metadatas"])
+                    docs.extend(data["documents"])
+
+                if not matrices:
+                    return False
+
+                self._emb_meta = metas
+                self._emb_docs = docs
+                self._emb_company = self._company_codes(metas)
+                self._emb_date = self._date_days(metas)
+                self._emb_matrix = np.vstack(matrices)
+                logger.info("Built in-memory embedding cache: %d chunks", len(metas))
+                return True
+
+            except Exception as e:
+                logger.warning(f"Failed to build in-memory embedding cache: {e}")
+                return False
+
+    def _emb_append(self, embeddings: Any, metadatas: List[Dict[str, Any]], documents: List[str]) -> None:
+        """Extend the built mirror with freshly ingested chunks"""
+        if not self.inmem_scan or self._emb_matrix is None:
+            return
+        with self._emb_lock:
+            if self._emb_matrix is None:
+                return
+            try:
+                self._emb_matrix = np.vstack(
+                    (self._emb_matrix, np.asarray(embeddings, dtype=np.float32))
+                )
+                self._emb_meta.extend(metadatas)
+                self._emb_docs.extend(documents)
+                self._emb_company = np.concatenate(
+                    (self._emb_company, self._company_codes(metadatas))
+                )
+                self._emb_date = np.concatenate(
+                    (self._emb_date, self._date_days(metadatas))
+                )
+            except Exception as e:
+                # Drop the mirror rather than serve a torn view; it
+                # rebuilds on the next search
+                logger.warning(f"Failed to extend in-memory embedding cache: {e}")
+                self._emb_matrix = None
+                self._emb_meta = []
+                self._emb_docs = []
+                self._emb_company = None
+                self._emb_date = None
+
+    def _company_codes(self, metadatas: List[Dict[str, Any]]) -> np.ndarray:
+        """Pack company symbols into int8 codes for vectorized masking"""
+        return np.fromiter(
+            (self._company_code.get(m.get("company", ""), -1) for m in metadatas),
+            dtype=np.int8,
+            count=len(metadatas)
+        )
+
+    @staticmethod
+    def _date_days(metadatas: List[Dict[str, Any]]) -> np.ndarray:
+        """Pack metadata dates into int32 days-since-epoch"""
+        return np.fromiter(
+            (_date_to_days(m.get("date", "")) for m in metadatas),
+            dtype=np.int32,
+            count=len(metadatas)
+        )
+
+    def _emb_invalidate(self) -> None:
+        """Drop the mirror; it rebuilds on the next search"""
+        with self._emb_lock:
+            self._emb_matrix = None
+            self._emb_meta = []
+            self._emb_docs = []
+            self._emb_company = None
+            self._emb_date = None
+
+    def _search_inmem(
+        self,
+        query_embedding: Any,
+        companies: Tuple[str, ...],
+        max_results: int,
+        similarity_threshold: float,
+        date_filter: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Exact scan over the in-memory matrix with vectorized filters"""
+        q = np.asarray(query_embedding, dtype=np.float32).ravel()
+        # Embeddings are L2-normalized, so the inner product is the cosine
+        scores = self._emb_matrix @ q
+
+        codes = [self._company_code[c] for c in companies if c in self._company_code]
+        if len(codes) == 1:
+            mask = self._emb_company == codes[0]
+        else:
+            mask = np.isin(self._emb_company, codes)
+        if date_filter:
+            # Rows without a parseable date (sentinel -1) never match a
+            # date filter, mirroring Chroma's where-clause behavior
+            mask &= self._emb_date >= 0
+            if date_filter.get("start"):
+                mask &= self._emb_date >= _date_to_days(date_filter["start"])
+            if date_filter.get("end"):
+                mask &= self._emb_date <= _date_to_days(date_filter["end"])
+        # In-place mask application: no second N-length temporary beyond
+        # the GEMV output itself
+        scores[~mask] = -np.inf
+
+        k = min(max_results, scores.shape[0])
+        top_idx = np.argpartition(scores, -k)[-k:]
+        top_idx = top_idx[np.argsort(scores[top_idx])[::-1]]
+
+        results = []
+        for idx in top_idx:
+            score = float(scores[idx])
+            if not np.isfinite(score) or score < similarity_threshold:
+                break  # sorted descending, nothing better follows
+            metadata = self._emb_meta[idx]
+            results.append({
+                "company": metadata.get("company", ""),
+                "document_id": metadata.get("document_id", ""),
+                "chunk_index": metadata.get("chunk_index", 0),
+                "date": metadata.get("date", ""),
+                "quarter": metadata.get("quarter", ""),
+                "content": self._emb_docs[idx],
+                "similarity_score": score,
+                "metadata": metadata
+            })
+        return results
+
+    def _search_unified(
+        self,
+        companies: Tuple[str, ...],
+        query_vector: Any,
+        max_results: int,
+        similarity_threshold: float,
+        date_filter: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query the unified collection once for all requested companies"""
+        try:
+            collection = self.db_manager.get_or_create_collection(self.UNIFIED_COLLECTION)
+
+            if collection.count() == 0:
+                logger.warning(f"Collection {self.UNIFIED_COLLECTION} is empty")
+                return []
+
+            # Chroma requires $and when combining multiple operators
+            conditions = [{"company": {"$in": list(companies)}}]
+            if date_filter:
+                if date_filter.get("start"):
+                    conditions.append({"date": {"$gte": date_filter["start"]}})
+                if date_filter.get("end"):
+                    conditions.append({"date": {"$lte": date_filter["end"]}})
+            where_clause = conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+            # Exactly max_results: HNSW's internal top-k heap already
+            # returns the best hits, so over-fetching just multiplies
+            # distance computations and metadata copies. tolist() because
+            # chromadb 0.4.15 only accepts list-of-lists embeddings
+            results = collection.query(
+                query_embeddings=query_vector.tolist(),
+                n_results=max_results,
+                where=where_clause,
+                include=["documents", "metadatas", "distances"]
+            )
+
+            all_results = []
+            if results["documents"] and results["documents"][0]:
+                for doc, metadata, distance in zip(
+                    results["documents"][0],
+                    results["metadatas"][0],
+                    results["distances"][0]
+                ):
+                    similarity_score = 1 - distance
+                    if similarity_score >= similarity_threshold:
+                        all_results.append({
+                            "company": metadata.get("company", ""),
+                            "document_id": metadata.get("document_id", ""),
+                            "chunk_index": metadata.get("chunk_index", 0),
+                            "date": metadata.get("date", ""),
+                            "quarter": metadata.get("quarter", ""),
+                            "content": doc,
+                            "similarity_score": similarity_score,
+                            "metadata": metadata
+                        })
+
             return all_results[:max_results]
-            
+
         except Exception as e:
-            logger.error(f"Failed to search similar chunks: {e}")
+            logger.warning(f"Failed to search unified collection: {e}")
+            return []
+
+    def _search_company(
+        self,
+        company: str,
+        query_vector: Any,
+        max_results: int,
+        similarity_threshold: float,
+        date_filter: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Query one company's collection and return its filtered hits"""
+        try:
+            collection = self._get_collection(company)
+
+            # Check if collection has documents
+            if collection.count() == 0:
+                logger.warning(f"Collection {collection.name} is empty")
+                return []
+
+            # Prepare where clause for filtering
+            where_clause = {"company": company}
+
+            # Add date filtering if specified
+            if date_filter:
+                if date_filter.get("start"):
+                    where_clause["date"] = {"$gte": date_filter["start"]}
+                if date_filter.get("end"):
+                    if "date" not in where_clause:
+                        where_clause["date"] = {}
+                    where_clause["date"]["$lte"] = date_filter["end"]
+
+            # Exactly max_results per company; the global heapq.nlargest
+            # merge then picks the best k across companies. Hits below the
+            # similarity threshold would rank below kept ones anyway, so
+            # over-fetching only multiplied HNSW distance computations.
+            # tolist() because chromadb 0.4.15 only accepts list-of-lists
+            results = collection.query(
+                query_embeddings=query_vector.tolist(),
+                n_results=max_results,
+                where=where_clause,
+                include=["documents", "metadatas", "distances"]
+            )
+
+            # Process results
+            company_results = []
+            if results["documents"] and results["documents"][0]:
+                for doc, metadata, distance in zip(
+                    results["documents"][0],
+                    results["metadatas"][0],
+                    results["distances"][0]
+                ):
+                    # Convert distance to similarity score
+                    similarity_score = 1 - distance
+
+                    if similarity_score >= similarity_threshold:
+                        company_results.append({
+                            "company": company,
+                            "document_id": metadata.get("document_id", ""),
+                            "chunk_index": metadata.get("chunk_index", 0),
+                            "date": metadata.get("date", ""),
+                            "quarter": metadata.get("quarter", ""),
+                            "content": doc,
+                            "similarity_score": similarity_score,
+                            "metadata": metadata
+                        })
+
+            return company_results
+
+        except Exception as e:
+            logger.warning(f"Failed to search in collection for {company}: {e}")
             return []
     
     def get_company_stats(self, company: str) -> Dict[str, Any]:
         """Get statistics for a company's documents"""
         try:
+            # Serve from the ingest-maintained aggregates when available;
+            # the metadata scan below is the cold-start fallback only
+            entry = self._stats_cache.get(company)
+            if entry is not None:
+                has_dates = entry["date_min"] is not None
+                return {
+                    "company": company,
+                    "name": self.company_names.get(company, company),
+                    "transcript_count": len(entry["documents"]),
+                    "chunk_count": entry["chunk_count"],
+                    "date_range": {
+                        "start": entry["date_min"],
+                        "end": entry["date_max"]
+                    } if has_dates else None,
+                    "latest_transcript": entry["date_max"]
+                }
+
             collection_name = self.get_collection_name(company)
             collection_info = self.db_manager.get_collection_info(collection_name)
             
@@ -196,12 +805,45 @@ class ChromaService:
                 }
             
             # Get collection to query metadata
-            collection = self.db_manager.get_or_create_collection(collection_name)
-            
-            # Get all metadata to analyze
-            results = collection.get(include=["metadatas"])
-            
-            if not results["metadatas"]:
+            collection = self._get_collection(company)
+
+            # Page through the metadata (scoped to the company when the
+            # collection is shared) and fold aggregates incrementally, so
+            # the cold rebuild never materializes every row at once
+            where = {"company": company} if self.single_collection else None
+            unique_documents = set()
+            date_min = date_max = None
+            chunk_count = 0
+            offset = 0
+            page_size = 10_000
+
+            while True:
+                batch = collection.get(
+                    where=where,
+                    limit=page_size,
+                    offset=offset,
+                    include=["metadatas"]
+                )
+                metadatas = batch["metadatas"]
+                if not metadatas:
+                    break
+
+                chunk_count += len(metadatas)
+                for metadata in metadatas:
+                    if metadata.get("document_id"):
+                        unique_documents.add(metadata["document_id"])
+                    chunk_date = metadata.get("date")
+                    if chunk_date:
+                        if date_min is None or chunk_date < date_min:
+                            date_min = chunk_date
+                        if date_max is None or chunk_date > date_max:
+                            date_max = chunk_date
+
+                if len(metadatas) < page_size:
+                    break
+                offset += page_size
+
+            if chunk_count == 0:
                 return {
                     "company": company,
                     "name": self.company_names.get(company, company),
@@ -210,29 +852,26 @@ class ChromaService:
                     "date_range": None,
                     "latest_transcript": None
                 }
-            
-            # Analyze metadata
-            unique_documents = set()
-            dates = []
-            
-            for metadata in results["metadatas"]:
-                if metadata.get("document_id"):
-                    unique_documents.add(metadata["document_id"])
-                if metadata.get("date"):
-                    dates.append(metadata["date"])
-            
-            dates.sort()
-            
+
+            # Seed the aggregates so the next read skips the scan
+            self._stats_cache[company] = {
+                "documents": unique_documents,
+                "chunk_count": chunk_count,
+                "date_min": date_min,
+                "date_max": date_max
+            }
+            self._persist_stats_cache()
+
             return {
                 "company": company,
                 "name": self.company_names.get(company, company),
                 "transcript_count": len(unique_documents),
-                "chunk_count": len(results["metadatas"]),
+                "chunk_count": chunk_count,
                 "date_range": {
-                    "start": dates[0] if dates else None,
-                    "end": dates[-1] if dates else None
-                } if dates else None,
-                "latest_transcript": dates[-1] if dates else None
+                    "start": date_min,
+                    "end": date_max
+                } if date_min else None,
+                "latest_transcript": date_max
             }
             
         except Exception as e:
@@ -246,10 +885,25 @@ class ChromaService:
                 "latest_transcript": None
             }
     
+    def get_chunk_counts(self) -> Dict[str, int]:
+        """Get per-company chunk counts from a single collection listing"""
+        if self.single_collection:
+            # Shared collection: counts live in per-company metadata scans
+            return {
+                company: self.get_company_stats(company).get("chunk_count", 0)
+                for company in self.company_tuple
+            }
+
+        infos = self.db_manager.get_all_collection_infos()
+        return {
+            company: infos.get(self.get_collection_name(company), {}).get("count", 0)
+            for company in self.company_tuple
+        }
+
     def get_all_companies_stats(self) -> List[Dict[str, Any]]:
         """Get statistics for all companies"""
         companies_stats = []
-        for company in self.company_names.keys():
+        for company in self.company_tuple:
             stats = self.get_company_stats(company)
             companies_stats.append(stats)
         
@@ -258,6 +912,19 @@ class ChromaService:
     def delete_company_data(self, company: str) -> bool:
         """Delete all data for a specific company"""
         try:
+            if self._stats_cache.pop(company, None) is not None:
+                self._persist_stats_cache()
+            self._prox_invalidate()
+            self._emb_invalidate()
+            self._collections.pop(company, None)
+
+            if self.single_collection:
+                # Other companies share the collection; delete by metadata
+                collection = self.db_manager.get_or_create_collection(self.UNIFIED_COLLECTION)
+                collection.delete(where={"company": company})
+                logger.info(f"Deleted {company} chunks from {self.UNIFIED_COLLECTION}")
+                return True
+
             collection_name = self.get_collection_name(company)
             return self.db_manager.delete_collection(collection_name)
         except Exception as e:
@@ -267,33 +934,43 @@ class ChromaService:
     def get_document_by_id(self, document_id: str, company: str) -> Optional[Dict[str, Any]]:
         """Get a specific document by ID"""
         try:
-            collection_name = self.get_collection_name(company)
-            collection = self.db_manager.get_or_create_collection(collection_name)
-            
-            # Search for chunks belonging to this document
-            results = collection.get(
-                where={"document_id": document_id},
+            collection = self._get_collection(company)
+
+            # Chunk IDs are deterministic ("<doc>_chunk_<i>"), so fetch the
+            # first chunk by ID to learn total_chunks, then enumerate the
+            # rest explicitly. This hits Chroma's ID map in O(total_chunks)
+            # instead of scanning every row's metadata for document_id.
+            first = collection.get(
+                ids=self.make_chunk_ids(document_id, 1),
                 include=["documents", "metadatas"]
             )
-            
-            if not results["documents"]:
+
+            if not first["documents"]:
                 return None
-            
-            # Combine chunks back into document
-            chunks = []
-            metadata = None
-            
-            for doc, meta in zip(results["documents"], results["metadatas"]):
-                chunks.append({
-                    "content": doc,
-                    "chunk_index": meta.get("chunk_index", 0)
-                })
-                if metadata is None:
-                    metadata = {k: v for k, v in meta.items() if k != "chunk_index"}
-            
-            # Sort chunks by index
+
+            first_meta = first["metadatas"][0]
+            total_chunks = first_meta.get("total_chunks", 1)
+            metadata = {k: v for k, v in first_meta.items() if k != "chunk_index"}
+
+            chunks = [{
+                "content": first["documents"][0],
+                "chunk_index": first_meta.get("chunk_index", 0)
+            }]
+
+            if total_chunks > 1:
+                rest = collection.get(
+                    ids=self.make_chunk_ids(document_id, total_chunks)[1:],
+                    include=["documents", "metadatas"]
+                )
+                chunks.extend(
+                    {"content": doc, "chunk_index": meta.get("chunk_index", 0)}
+                    for doc, meta in zip(rest["documents"], rest["metadatas"])
+                )
+
+            # Chroma returns ID lookups in lexicographic ID order, which
+            # diverges from numeric order past 10 chunks; restore it
             chunks.sort(key=lambda x: x["chunk_index"])
-            
+
             return {
                 "document_id": document_id,
                 "company": company,
@@ -333,10 +1010,7 @@ class ChromaService:
             }
 
 
-# Global chroma service instance
-chroma_service = ChromaService()
-
-
+@lru_cache(maxsize=1)
 def get_chroma_service() -> ChromaService:
-    """Dependency to get chroma service instance"""
-    return chroma_service 
\ No newline at end of file
+    """Dependency to get the chroma service instance (created on first use)"""
+    return ChromaService()
\ No newline at end of file
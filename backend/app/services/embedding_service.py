@@ -1,10 +1,15 @@
 from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from functools import lru_cache
+import asyncio
 import numpy as np
 import logging
 import os
+import re
 from pathlib import Path
-import pickle
 import hashlib
+import sqlite3
+import threading
 
 from ..core.config import get_settings
 
@@ -17,69 +22,332 @@ except ImportError as e:
     SentenceTransformer = None
     SENTENCE_TRANSFORMERS_AVAILABLE = False
 
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    ONNX_RUNTIME_AVAILABLE = True
+except ImportError:
+    ORTModelForFeatureExtraction = None
+    AutoTokenizer = None
+    ONNX_RUNTIME_AVAILABLE = False
+
+try:
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    ONNX_QUANTIZATION_AVAILABLE = True
+except ImportError:
+    ORTQuantizer = None
+    AutoQuantizationConfig = None
+    ONNX_QUANTIZATION_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+_WHITESPACE = re.compile(r"\s+")
+
+
+class OnnxEncoder:
+    """Minimal encode() wrapper around an ONNX Runtime feature-extraction model.
+
+    Mirrors the parts of the SentenceTransformer interface the service uses
+    (encode, tokenizer, max_seq_length, get_sentence_embedding_dimension) so
+    call sites don't care which backend is loaded.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, cache_dir: Optional[Path] = None):
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_name, export=True, provider="CPUExecutionProvider"
+        )
+        if quantize:
+            self.model = self._quantize(self.model, model_name, cache_dir)
+        max_length = getattr(self.tokenizer, "model_max_length", 512)
+        self.max_seq_length = min(max_length, 512)
+        self._dimension: Optional[int] = None
+
+    @staticmethod
+    def _quantize(model, model_name: str, cache_dir: Optional[Path]):
+        """Apply dynamic int8 quantization to the exported graph.
+
+        Int8 GEMMs hit the VNNI path on current server CPUs and halve
+        activation memory traffic; the quantized model is persisted so the
+        conversion only runs once per model. Falls back to the fp32 graph
+        if quantization isn't available or fails.
+        """
+        if not ONNX_QUANTIZATION_AVAILABLE:
+            logger.warning(
+                "ONNX quantization requested but optimum quantizers are not "
+                "installed; using the fp32 graph"
+            )
+            return model
+        try:
+            save_dir = Path(cache_dir or ".") / "onnx-int8" / model_name.replace("/", "__")
+            if not (save_dir / "model_quantized.onnx").exists():
+                save_dir.mkdir(parents=True, exist_ok=True)
+                ORTQuantizer.from_pretrained(model).quantize(
+                    save_dir=str(save_dir),
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+                )
+            logger.info(f"Using int8-quantized ONNX model from {save_dir}")
+            return ORTModelForFeatureExtraction.from_pretrained(
+                str(save_dir), provider="CPUExecutionProvider"
+            )
+        except Exception as e:
+            logger.warning(f"ONNX int8 quantization failed, using fp32 graph: {e}")
+            return model
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = int(self.encode(["probe"]).shape[1])
+        return self._dimension
+
+    def encode(
+        self,
+        texts,
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = True
+    ) -> np.ndarray:
+        if isinstance(texts, str):
+            texts = [texts]
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            encoded = self.tokenizer(
+                batch,
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            output = self.model(**encoded)
+            hidden = np.asarray(output.last_hidden_state)
+
+            # Mean pooling over non-padding tokens
+            mask = np.asarray(encoded["attention_mask"])[..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            batches.append(pooled)
+
+        embeddings = np.concatenate(batches, axis=0).astype(np.float32)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+
+        return embeddings
+
 
 class EmbeddingService:
     """Service for generating and managing text embeddings"""
     
     def __init__(self):
         self.settings = get_settings()
-        self.model: Optional[SentenceTransformer] = None
+        self.model: Optional[Any] = None
         self.model_name = self.settings.EMBEDDING_MODEL
         self.device = self.settings.EMBEDDING_DEVICE
+        self.backend = self.settings.EMBEDDING_BACKEND
         self.batch_size = self.settings.BATCH_SIZE
         
-        # Cache for embeddings
+        # On-disk embedding cache: one memory-mapped fp32 matrix holding
+        # the vectors and a sqlite index mapping text hash -> row. One
+        # mmap open amortizes across all lookups and a hit is a row copy,
+        # not a file open + unpickle per text.
         self.cache_dir = Path(self.settings.EMBEDDINGS_PATH)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._matrix_path = self.cache_dir / "matrix.f32"
+        self._disk_lock = threading.Lock()
+        self._disk_db: Optional[sqlite3.Connection] = None
+        self._disk_mat: Optional[np.memmap] = None
+        # Storage dtype for new matrices; an existing matrix keeps the
+        # dtype it was created with (recorded in the meta table)
+        self._disk_dtype = (
+            np.float16
+            if self.settings.EMBEDDING_CACHE_DTYPE == "float16"
+            else np.float32
+        )
+        self._disk_dim = 0
+        self._disk_count = 0
+        self._disk_capacity = 0
+
+        # In-memory mirror of cache hits keyed by cache key, so repeat
+        # lookups within a process are dict speed with no sqlite round-trip
+        self._mem_cache: Dict[str, np.ndarray] = {}
+
+        # Bounded LRU over normalized query strings, shared by the sync
+        # and batched encode paths; popular questions recur, and a hit
+        # skips a full encoder forward pass
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._query_cache_hits = 0
+        self._query_cache_misses = 0
+
+        # Small LRU for the raw single-text path (encode_single_text)
+        self._encode_single_cached = lru_cache(maxsize=256)(self._encode_single)
+
+        # Micro-batcher state, created lazily on the serving event loop
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._batch_loop = None
     
     def is_available(self) -> bool:
         """Check if the embedding service is available"""
+        if self.backend == "onnx" and ONNX_RUNTIME_AVAILABLE:
+            return True
         return SENTENCE_TRANSFORMERS_AVAILABLE
     
-    def load_model(self) -> SentenceTransformer:
-        """Load or get cached sentence transformer model"""
+    def load_model(self) -> Any:
+        """Load or get the cached embedding model for the configured backend"""
+        if self.model is not None:
+            return self.model
+
+        if self.backend == "onnx":
+            if ONNX_RUNTIME_AVAILABLE:
+                try:
+                    logger.info(f"Loading embedding model with ONNX Runtime: {self.model_name}")
+                    self.model = OnnxEncoder(
+                        self.model_name,
+                        quantize=self.settings.EMBEDDING_ONNX_INT8,
+                        cache_dir=self.cache_dir
+                    )
+                    logger.info("ONNX Runtime model loaded successfully")
+                    return self.model
+                except Exception as e:
+                    logger.error(f"Failed to load ONNX model, falling back to PyTorch: {e}")
+            else:
+                logger.warning(
+                    "EMBEDDING_BACKEND=onnx but optimum[onnxruntime] is not "
+                    "installed; falling back to PyTorch"
+                )
+
         if not SENTENCE_TRANSFORMERS_AVAILABLE:
             raise ImportError(
                 "SentenceTransformers is not available. "
                 "Please install compatible sentence-transformers package or fix compatibility issues."
             )
-            
-        if self.model is None:
-            try:
-                logger.info(f"Loading embedding model: {self.model_name}")
-                self.model = SentenceTransformer(self.model_name, device=self.device)
-                logger.info(f"Model loaded successfully on device: {self.device}")
-            except Exception as e:
-                logger.error(f"Failed to load embedding model: {e}")
-                raise
-        
+
+        try:
+            self._configure_torch_threads()
+            self.device = self._resolve_device()
+            logger.info(f"Loading embedding model: {self.model_name}")
+            self.model = SentenceTransformer(self.model_name, device=self.device)
+            if self.device == "cuda" and self.settings.EMBEDDING_FP16:
+                self.model.half()
+            logger.info(f"Model loaded successfully on device: {self.device}")
+        except Exception as e:
+            logger.error(f"Failed to load embedding model: {e}")
+            raise
+
         return self.model
-    
+
+    def _resolve_device(self) -> str:
+        """Resolve EMBEDDING_DEVICE="auto" to the best available device.
+
+        A GPU is a 5-10x encode-throughput lever when present; explicit
+        settings pass through untouched.
+        """
+        if self.device != "auto":
+            return self.device
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                return "cuda"
+            mps = getattr(torch.backends, "mps", None)
+            if mps is not None and mps.is_available():
+                return "mps"
+        except Exception as e:
+            logger.warning(f"Device auto-detection failed, using cpu: {e}")
+        return "cpu"
+
+    def _configure_torch_threads(self) -> None:
+        """Pin torch's intra-op thread count before the model loads.
+
+        Default OMP thread counts are often 1 (or clobbered by the
+        container runtime), leaving cores idle during CPU encodes; past
+        ~8 threads sync overhead eats the gains, so that's the auto cap.
+        """
+        try:
+            import torch
+
+            n = self.settings.TORCH_NUM_THREADS or min(os.cpu_count() or 1, 8)
+            os.environ.setdefault("OMP_NUM_THREADS", str(n))
+            os.environ.setdefault("MKL_NUM_THREADS", str(n))
+            torch.set_num_threads(n)
+            try:
+                # Raises if the inter-op pool already started; the intra-op
+                # setting above is the one that matters for encode throughput
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass
+            logger.info(f"Torch intra-op threads set to {n}")
+        except Exception as e:
+            logger.warning(f"Could not configure torch threads: {e}")
+
+    def warm_up(self) -> None:
+        """Load the model and run a small warmup batch so the first real
+        request doesn't pay load and kernel-init latency"""
+        model = self.load_model()
+        model.encode(["warmup"] * 4, batch_size=4, show_progress_bar=False)
+        logger.info("Embedding model warmed up")
+
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings from the model"""
         model = self.load_model()
         return model.get_sentence_embedding_dimension()
+
+    def get_tokenizer(self):
+        """Get the underlying HuggingFace fast tokenizer from the model"""
+        model = self.load_model()
+        return model.tokenizer
+
+    def get_max_seq_length(self) -> int:
+        """Get the maximum sequence length (in tokens) of the model"""
+        model = self.load_model()
+        return model.max_seq_length
     
-    def encode_texts(self, texts: List[str], show_progress: bool = True) -> np.ndarray:
+    def encode_texts(
+        self,
+        texts: List[str],
+        show_progress: bool = True,
+        batch_size: Optional[int] = None,
+        normalize: bool = True
+    ) -> np.ndarray:
         """Encode a list of texts into embeddings"""
         if not texts:
             return np.array([])
-        
+
         try:
             model = self.load_model()
-            
-            logger.info(f"Encoding {len(texts)} texts with batch size {self.batch_size}")
-            
+
+            batch_size = batch_size or self.batch_size
+            logger.info(f"Encoding {len(texts)} texts with batch size {batch_size}")
+
+            # Smart batching: encode in length order so each minibatch only
+            # pads to its own longest text, then restore the input order.
+            # Only worth the shuffle when there is more than one minibatch.
+            order = None
+            if len(texts) > batch_size:
+                order = np.argsort([len(text) for text in texts], kind="stable")
+                texts = [texts[i] for i in order]
+
             embeddings = model.encode(
                 texts,
-                batch_size=self.batch_size,
+                batch_size=batch_size,
                 show_progress_bar=show_progress,
                 convert_to_numpy=True,
-                normalize_embeddings=True  # Normalize for better similarity search
+                normalize_embeddings=normalize  # Normalize for better similarity search
             )
-            
+
+            # Half-precision models emit fp16; store and compare in fp32
+            if embeddings.dtype != np.float32:
+                embeddings = embeddings.astype(np.float32)
+
+            if order is not None:
+                unsorted = np.empty_like(embeddings)
+                unsorted[order] = embeddings
+                embeddings = unsorted
+
             logger.info(f"Generated embeddings shape: {embeddings.shape}")
             return embeddings
             
@@ -87,115 +355,467 @@ class EmbeddingService:
             logger.error(f"Failed to encode texts: {e}")
             raise
     
+    # Below this many texts the multi-process pool's startup cost (one
+    # model load per worker) outweighs the parallel speedup
+    BULK_MULTIPROCESS_MIN = 10_000
+
+    def encode_texts_bulk(self, texts: List[str]) -> np.ndarray:
+        """Encode a large corpus, sharding across processes/GPUs when it pays.
+
+        For bulk ingestion only: encode_multi_process data-parallelizes
+        across all visible GPUs (or CPU workers) with near-linear scaling
+        since inference has no cross-worker sync. Small inputs and the
+        ONNX backend fall through to the single-process path.
+        """
+        if len(texts) < self.BULK_MULTIPROCESS_MIN:
+            return self.encode_texts(texts, show_progress=True)
+
+        model = self.load_model()
+        if not hasattr(model, "start_multi_process_pool"):
+            return self.encode_texts(texts, show_progress=True)
+
+        try:
+            logger.info(f"Bulk-encoding {len(texts)} texts with a multi-process pool")
+            pool = model.start_multi_process_pool()
+            try:
+                embeddings = model.encode_multi_process(
+                    texts, pool, batch_size=self.batch_size
+                )
+            finally:
+                model.stop_multi_process_pool(pool)
+            return embeddings.astype(np.float32, copy=False)
+        except Exception as e:
+            logger.warning(f"Multi-process encoding failed, using single process: {e}")
+            return self.encode_texts(texts, show_progress=True)
+
+    def _encode_single(self, text: str) -> np.ndarray:
+        """Direct single-string encode (wrapped by the LRU in __init__).
+
+        Passing the bare string skips the batch path's list boxing and
+        batching preamble, which dominate a one-item encode.
+        """
+        model = self.load_model()
+        embedding = model.encode(
+            text,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        embedding = np.asarray(embedding, dtype=np.float32)
+        # The ONNX wrapper returns a (1, dim) batch even for a bare string
+        return embedding[0] if embedding.ndim == 2 else embedding
+
     def encode_single_text(self, text: str) -> np.ndarray:
-        """Encode a single text into embedding"""
-        return self.encode_texts([text], show_progress=False)[0]
+        """Encode a single text into embedding.
+
+        Repeats are served from a small LRU; callers must treat the
+        returned array as read-only.
+        """
+        return self._encode_single_cached(text)
+
+    def _encode_query(self, normalized: str) -> np.ndarray:
+        """Encode a normalized query string (called on a query-cache miss)"""
+        return self.encode_texts([normalized], show_progress=False)[0]
+
+    # Cap on the shared query-embedding LRU
+    QUERY_CACHE_MAX = 4096
+
+    def _query_cache_get(self, normalized: str) -> Optional[np.ndarray]:
+        """Look up a normalized query, tracking hit/miss counts"""
+        with self._query_cache_lock:
+            embedding = self._query_cache.get(normalized)
+            if embedding is None:
+                self._query_cache_misses += 1
+            else:
+                self._query_cache.move_to_end(normalized)
+                self._query_cache_hits += 1
+            return embedding
+
+    def _query_cache_put(self, normalized: str, embedding: np.ndarray) -> None:
+        with self._query_cache_lock:
+            self._query_cache[normalized] = embedding
+            self._query_cache.move_to_end(normalized)
+            while len(self._query_cache) > self.QUERY_CACHE_MAX:
+                self._query_cache.popitem(last=False)
+
+    def _query_cache_info(self) -> Dict[str, int]:
+        with self._query_cache_lock:
+            return {
+                "hits": self._query_cache_hits,
+                "misses": self._query_cache_misses,
+                "maxsize": self.QUERY_CACHE_MAX,
+                "currsize": len(self._query_cache)
+            }
+
+    # How long the batch worker waits for more queries to coalesce before
+    # running the encoder; small enough to be invisible per request
+    BATCH_WAIT_S = 0.005
+
+    def _ensure_batcher(self) -> None:
+        """Start (or restart) the batch worker on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop:
+            self._batch_queue = asyncio.Queue()
+            self._batch_task = loop.create_task(self._batch_worker())
+            self._batch_loop = loop
+
+    async def _batch_worker(self) -> None:
+        """Coalesce queued queries into single encoder batches"""
+        while True:
+            items = [await self._batch_queue.get()]
+
+            # Coalesce only when other queries are already waiting; a lone
+            # query shouldn't pay the batching window
+            if not self._batch_queue.empty():
+                await asyncio.sleep(self.BATCH_WAIT_S)
+            while not self._batch_queue.empty() and len(items) < self.batch_size:
+                items.append(self._batch_queue.get_nowait())
+
+            texts = [text for text, _ in items]
+            try:
+                embeddings = await asyncio.to_thread(
+                    self.encode_texts, texts, False, len(texts)
+                )
+                for (text, future), embedding in zip(items, embeddings):
+                    self._query_cache_put(text, embedding)
+                    if not future.done():
+                        future.set_result(embedding)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def encode_batched(self, text: str) -> np.ndarray:
+        """Encode one query, coalescing with other in-flight queries.
+
+        Repeats are served straight from the shared query-embedding LRU;
+        misses are queued so concurrent callers landing within the batch
+        window share a single forward pass instead of issuing N
+        one-sample encodes.
+        """
+        normalized = _WHITESPACE.sub(" ", text.strip().lower())
+        cached = self._query_cache_get(normalized)
+        if cached is not None:
+            return cached
+
+        self._ensure_batcher()
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((normalized, future))
+        return await future
+
+    def encode_query(self, text: str) -> np.ndarray:
+        """Encode a search query, serving repeats from an in-memory LRU.
+
+        Queries are normalized (lowercased, whitespace-collapsed) before
+        lookup so trivially different phrasings share a cache entry. Callers
+        must treat the returned array as read-only.
+        """
+        normalized = _WHITESPACE.sub(" ", text.strip().lower())
+        embedding = self._query_cache_get(normalized)
+        if embedding is None:
+            embedding = self._encode_query(normalized)
+            self._query_cache_put(normalized, embedding)
+        return embedding
     
+    @staticmethod
+    def normalize(vector: np.ndarray) -> np.ndarray:
+        """L2-normalize a vector that didn't come from encode_texts"""
+        denom = np.sqrt(np.vdot(vector, vector))
+        if denom == 0:
+            return vector
+        return vector / denom
+
     def compute_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
-        """Compute cosine similarity between two embeddings"""
+        """Compute cosine similarity between two embeddings.
+
+        Assumes unit-norm inputs (encode_texts normalizes on the way out),
+        so this is a single BLAS dot; pass external vectors through
+        normalize() first.
+        """
         try:
-            # Ensure embeddings are normalized
-            norm1 = np.linalg.norm(embedding1)
-            norm2 = np.linalg.norm(embedding2)
-            
-            if norm1 == 0 or norm2 == 0:
+            if not np.any(embedding1) or not np.any(embedding2):
                 return 0.0
-            
-            # Compute cosine similarity
-            similarity = np.dot(embedding1, embedding2) / (norm1 * norm2)
-            return float(similarity)
-            
+            return float(np.dot(embedding1, embedding2))
+
         except Exception as e:
             logger.error(f"Failed to compute similarity: {e}")
             return 0.0
+
+    def compute_similarities(self, query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        """Cosine similarities of one query against a matrix of embeddings.
+
+        Assumes both sides are L2-normalized (encode_texts normalizes by
+        default), so one BLAS GEMV replaces per-pair Python calls and norm
+        recomputation.
+        """
+        return matrix @ query
     
     def _get_cache_key(self, text: str) -> str:
-        """Generate cache key for text"""
-        return hashlib.md5(text.encode()).hexdigest()
-    
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """Get cache file path for embedding"""
-        return self.cache_dir / f"{cache_key}.pkl"
-    
+        """Generate cache key for text.
+
+        SHA-256 routes through OpenSSL's SHA-NI path on current CPUs, so
+        it hashes long transcript chunks several times faster than md5 or
+        blake2b; 128 truncated bits keep collisions negligible for a
+        local cache.
+        """
+        return hashlib.sha256(text.encode(), usedforsecurity=False).hexdigest()[:32]
+
+    # Initial row capacity of the memmapped matrix; grows by doubling
+    _DISK_INITIAL_CAPACITY = 4096
+
+    def _open_disk_cache(self) -> None:
+        """Open (or create) the sqlite index and memmapped matrix.
+
+        Callers must hold self._disk_lock.
+        """
+        if self._disk_db is not None:
+            return
+
+        db = sqlite3.connect(str(self.cache_dir / "index.db"), check_same_thread=False)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS emb "
+            "(hash TEXT PRIMARY KEY, row INTEGER NOT NULL, model TEXT NOT NULL)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        db.commit()
+        self._disk_db = db
+
+        meta = dict(db.execute("SELECT key, value FROM meta").fetchall())
+        self._disk_dim = meta.get("dim", 0)
+        self._disk_count = meta.get("count", 0)
+        self._disk_capacity = meta.get("capacity", 0)
+
+        # An existing matrix keeps its recorded dtype even if the setting
+        # changed since, so old entries stay readable
+        stored_itemsize = meta.get("itemsize")
+        if stored_itemsize is not None:
+            stored_dtype = np.float16 if stored_itemsize == 2 else np.float32
+            if stored_dtype != self._disk_dtype:
+                logger.warning(
+                    "Embedding cache matrix is %s; EMBEDDING_CACHE_DTYPE takes "
+                    "effect after clear_cache rebuilds it", np.dtype(stored_dtype).name
+                )
+            self._disk_dtype = stored_dtype
+
+        if self._disk_dim and self._disk_capacity and self._matrix_path.exists():
+            self._disk_mat = np.memmap(
+                self._matrix_path, dtype=self._disk_dtype, mode="r+",
+                shape=(self._disk_capacity, self._disk_dim)
+            )
+
+    def _ensure_matrix(self, dim: int, extra_rows: int) -> None:
+        """Size the memmap for at least count + extra_rows rows.
+
+        Callers must hold self._disk_lock.
+        """
+        if self._disk_dim == 0:
+            self._disk_dim = dim
+            self._disk_db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (dim,))
+            self._disk_db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('itemsize', ?)",
+                (np.dtype(self._disk_dtype).itemsize,)
+            )
+
+        needed = self._disk_count + extra_rows
+        if needed <= self._disk_capacity and self._disk_mat is not None:
+            return
+
+        capacity = max(self._disk_capacity, self._DISK_INITIAL_CAPACITY)
+        while capacity < needed:
+            capacity *= 2
+
+        if self._disk_mat is not None:
+            self._disk_mat.flush()
+        itemsize = np.dtype(self._disk_dtype).itemsize
+        with open(self._matrix_path, "ab") as f:
+            f.truncate(capacity * self._disk_dim * itemsize)
+        self._disk_mat = np.memmap(
+            self._matrix_path, dtype=self._disk_dtype, mode="r+",
+            shape=(capacity, self._disk_dim)
+        )
+        self._disk_capacity = capacity
+        self._disk_db.execute("INSERT OR REPLACE INTO meta VALUES ('capacity', ?)", (capacity,))
+        self._disk_db.commit()
+
     def save_embedding_to_cache(self, text: str, embedding: np.ndarray) -> None:
-        """Save embedding to cache"""
+        """Append an embedding to the on-disk cache"""
         try:
-            cache_key = self._get_cache_key(text)
-            cache_path = self._get_cache_path(cache_key)
-            
-            with open(cache_path, 'wb') as f:
-                pickle.dump({
-                    'text': text,
-                    'embedding': embedding,
-                    'model': self.model_name
-                }, f)
-                
+            with self._disk_lock:
+                self._open_disk_cache()
+                self._ensure_matrix(int(embedding.shape[-1]), 1)
+                row = self._disk_count
+                self._disk_mat[row] = embedding.astype(self._disk_dtype, copy=False)
+                self._disk_db.execute(
+                    "INSERT OR REPLACE INTO emb VALUES (?, ?, ?)",
+                    (self._get_cache_key(text), row, self.model_name)
+                )
+                self._disk_count = row + 1
+                self._disk_db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('count', ?)", (self._disk_count,)
+                )
+                self._disk_db.commit()
         except Exception as e:
             logger.warning(f"Failed to save embedding to cache: {e}")
-    
+
+    def save_embeddings_many(self, texts: List[str], embeddings: Any) -> None:
+        """Append a batch of embeddings to the on-disk cache.
+
+        One lock acquisition, one executemany and one commit cover the
+        whole batch — instead of an fsync per embedding, which dominates
+        the flush path during a full ingest.
+        """
+        if not len(texts):
+            return
+        try:
+            block = np.asarray(embeddings)
+            with self._disk_lock:
+                self._open_disk_cache()
+                self._ensure_matrix(int(block.shape[-1]), len(texts))
+                start = self._disk_count
+                self._disk_mat[start:start + len(texts)] = block.astype(
+                    self._disk_dtype, copy=False
+                )
+                self._disk_db.executemany(
+                    "INSERT OR REPLACE INTO emb VALUES (?, ?, ?)",
+                    [
+                        (self._get_cache_key(text), start + i, self.model_name)
+                        for i, text in enumerate(texts)
+                    ]
+                )
+                self._disk_count = start + len(texts)
+                self._disk_db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('count', ?)", (self._disk_count,)
+                )
+                self._disk_db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to save embedding batch to cache: {e}")
+
     def load_embedding_from_cache(self, text: str) -> Optional[np.ndarray]:
         """Load embedding from cache if available"""
         try:
-            cache_key = self._get_cache_key(text)
-            cache_path = self._get_cache_path(cache_key)
-            
-            if not cache_path.exists():
-                return None
-            
-            with open(cache_path, 'rb') as f:
-                data = pickle.load(f)
-            
-            # Check if the model matches
-            if data.get('model') != self.model_name:
-                return None
-            
-            return data['embedding']
-            
+            with self._disk_lock:
+                self._open_disk_cache()
+                if self._disk_mat is None:
+                    return None
+                hit = self._disk_db.execute(
+                    "SELECT row FROM emb WHERE hash = ? AND model = ?",
+                    (self._get_cache_key(text), self.model_name)
+                ).fetchone()
+                if hit is None:
+                    return None
+                # Cast back to fp32 so callers see a uniform dtype
+                return np.array(self._disk_mat[hit[0]], dtype=np.float32)
         except Exception as e:
             logger.warning(f"Failed to load embedding from cache: {e}")
             return None
-    
+
+    def _disk_lookup_rows(self, cache_keys: List[str]) -> Dict[str, np.ndarray]:
+        """Bulk lookup of cache keys against the sqlite index.
+
+        One SELECT covers every key and the rows come out of the memmap as
+        a single fancy-index gather.
+        """
+        hits: Dict[str, np.ndarray] = {}
+        if not cache_keys:
+            return hits
+        try:
+            with self._disk_lock:
+                self._open_disk_cache()
+                if self._disk_mat is None:
+                    return hits
+
+                placeholders = ",".join("?" * len(cache_keys))
+                rows = self._disk_db.execute(
+                    f"SELECT hash, row FROM emb WHERE model = ? AND hash IN ({placeholders})",
+                    (self.model_name, *cache_keys)
+                ).fetchall()
+                if not rows:
+                    return hits
+                gathered = self._disk_mat[[row for _, row in rows]].astype(
+                    np.float32, copy=False
+                )
+                for (key, _), embedding in zip(rows, gathered):
+                    hits[key] = embedding
+        except Exception as e:
+            logger.warning(f"Failed bulk cache lookup: {e}")
+        return hits
+
+    def get_cached_many(self, texts_by_hash: Dict[bytes, str]) -> Dict[bytes, np.ndarray]:
+        """Bulk cache lookup; returns embeddings for texts found in the cache"""
+        keys = {
+            digest: self._get_cache_key(text)
+            for digest, text in texts_by_hash.items()
+        }
+        rows = self._disk_lookup_rows(list(dict.fromkeys(keys.values())))
+        return {digest: rows[key] for digest, key in keys.items() if key in rows}
+
     def encode_with_cache(self, texts: List[str], use_cache: bool = True) -> np.ndarray:
-        """Encode texts with caching support"""
-        if not use_cache:
+        """Encode texts with caching support.
+
+        Hashes every text once, resolves hits against the in-memory mirror
+        plus one bulk disk lookup, encodes only the misses, and assembles
+        the output into a preallocated matrix instead of np.array over a
+        Python list.
+        """
+        if not use_cache or not texts:
             return self.encode_texts(texts)
-        
-        embeddings = []
-        texts_to_encode = []
-        indices_to_encode = []
-        
-        # Check cache for each text
-        for i, text in enumerate(texts):
-            cached_embedding = self.load_embedding_from_cache(text)
-            if cached_embedding is not None:
-                embeddings.append(cached_embedding)
-            else:
-                embeddings.append(None)
-                texts_to_encode.append(text)
-                indices_to_encode.append(i)
-        
-        # Encode uncached texts
-        if texts_to_encode:
-            logger.info(f"Encoding {len(texts_to_encode)} uncached texts")
-            new_embeddings = self.encode_texts(texts_to_encode)
-            
-            # Save to cache and update results
-            for i, (text, embedding) in enumerate(zip(texts_to_encode, new_embeddings)):
-                self.save_embedding_to_cache(text, embedding)
-                embeddings[indices_to_encode[i]] = embedding
-        
-        return np.array(embeddings)
+
+        keys = [self._get_cache_key(text) for text in texts]
+
+        # Pull disk hits for keys the in-memory mirror doesn't have yet
+        unknown = list(dict.fromkeys(
+            key for key in keys if key not in self._mem_cache
+        ))
+        if unknown:
+            self._mem_cache.update(self._disk_lookup_rows(unknown))
+
+        to_encode = [i for i, key in enumerate(keys) if key not in self._mem_cache]
+        if to_encode:
+            logger.info(f"Encoding {len(to_encode)} uncached texts")
+            miss_texts = [texts[i] for i in to_encode]
+            new_embeddings = self.encode_texts(miss_texts, show_progress=False)
+            self.save_embeddings_many(miss_texts, new_embeddings)
+            for i, embedding in zip(to_encode, new_embeddings):
+                self._mem_cache[keys[i]] = embedding
+
+        out = np.empty(
+            (len(texts), self._mem_cache[keys[0]].shape[-1]), dtype=np.float32
+        )
+        for i, key in enumerate(keys):
+            out[i] = self._mem_cache[key]
+        return out
     
+    def clear_query_cache(self) -> None:
+        """Drop the in-memory query-embedding LRU"""
+        with self._query_cache_lock:
+            self._query_cache.clear()
+            self._query_cache_hits = 0
+            self._query_cache_misses = 0
+
     def clear_cache(self) -> int:
         """Clear embedding cache"""
         try:
-            cache_files = list(self.cache_dir.glob("*.pkl"))
-            for cache_file in cache_files:
+            self.clear_query_cache()
+
+            # Legacy per-text pickles, if any remain from older versions
+            removed = 0
+            for cache_file in self.cache_dir.glob("*.pkl"):
                 cache_file.unlink()
-            
-            logger.info(f"Cleared {len(cache_files)} cached embeddings")
-            return len(cache_files)
-            
+                removed += 1
+
+            with self._disk_lock:
+                self._open_disk_cache()
+                removed += self._disk_db.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+                self._disk_db.execute("DELETE FROM emb")
+                self._disk_db.execute("INSERT OR REPLACE INTO meta VALUES ('count', 0)")
+                self._disk_db.commit()
+                self._disk_count = 0
+
+            logger.info(f"Cleared {removed} cached embeddings")
+            return removed
+
         except Exception as e:
             logger.error(f"Failed to clear cache: {e}")
             return 0
@@ -203,16 +823,19 @@ class EmbeddingService:
     def get_cache_info(self) -> Dict[str, Any]:
         """Get information about embedding cache"""
         try:
-            cache_files = list(self.cache_dir.glob("*.pkl"))
-            total_size = sum(f.stat().st_size for f in cache_files)
-            
+            with self._disk_lock:
+                self._open_disk_cache()
+                cached = self._disk_count
+            matrix_size = self._matrix_path.stat().st_size if self._matrix_path.exists() else 0
+
             return {
-                "cached_embeddings": len(cache_files),
-                "cache_size_mb": round(total_size / (1024 * 1024), 2),
+                "cached_embeddings": cached,
+                "cache_size_mb": round(matrix_size / (1024 * 1024), 2),
                 "cache_directory": str(self.cache_dir),
-                "model_name": self.model_name
+                "model_name": self.model_name,
+                "query_cache": self._query_cache_info()
             }
-            
+
         except Exception as e:
             logger.error(f"Failed to get cache info: {e}")
             return {
@@ -223,10 +846,7 @@ class EmbeddingService:
             }
 
 
-# Global embedding service instance
-embedding_service = EmbeddingService()
-
-
+@lru_cache(maxsize=1)
 def get_embedding_service() -> EmbeddingService:
-    """Dependency to get embedding service instance"""
-    return embedding_service 
\ No newline at end of file
+    """Dependency to get the embedding service instance (created on first use)"""
+    return EmbeddingService()
\ No newline at end of file
@@ -1,36 +1,114 @@
 import google.generativeai as genai
 from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from collections import OrderedDict
+import hashlib
+import json
 import logging
+import re
 from datetime import datetime
 import time
 
+# Gemini calls are network-bound waits of 1-10s; the async variants below
+# use generate_content_async so one event loop can overlap many in-flight
+# generations instead of parking a worker thread per call.
+
 from ..core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Precompiled parsers for the structured sentiment reply: one C-level
+# match per line instead of three startswith checks plus split, and a
+# float scan that can't raise on non-numeric confidence lines
+_SENT_RE = re.compile(r'^\s*(Sentiment|Confidence|Reasoning)\s*:\s*(.+?)\s*$', re.IGNORECASE)
+_FLOAT_RE = re.compile(r'[-+]?\d*\.?\d+')
+
+# Pre-bound source-block template; binding .format once skips the method
+# lookup per source when the prompt is assembled
+_SRC_TMPL = (
+    "Source {i} - {company}{quarter_info} - {date} (Relevance: {similarity:.2f}):\n"
+    "{content}\n"
+).format
+
+# Static analyst persona + answer instructions, rendered once at import
+# and prepended to each RAG prompt. The pinned google-generativeai 0.3.0
+# has no system_instruction parameter; revisit when the pin moves.
+_RAG_SYSTEM = """You are a financial analyst AI assistant specialized in analyzing earnings call transcripts.
+Your task is to provide accurate, insightful answers based on the provided financial transcript excerpts.
+
+INSTRUCTIONS:
+1. Base your answer primarily on the provided transcript excerpts
+2. Provide specific, factual information with clear attribution to companies and time periods
+3. If the question asks about trends, compare information across different time periods or companies
+4. If the provided context doesn't fully answer the question, acknowledge the limitations
+5. Use financial terminology appropriately and explain complex concepts when necessary
+6. Structure your response clearly with key points highlighted
+7. When referencing specific information, mention the company and time period"""
+
 
 class GeminiService:
     """Service for Google Gemini Pro API interactions"""
-    
+
+    MODEL_NAME = 'gemini-2.0-flash'
+
+    # Responses are cached only at or below this temperature; hotter
+    # generations are deliberately non-deterministic and a cached reply
+    # would defeat that
+    CACHE_MAX_TEMPERATURE = 0.3
+    CACHE_MAX_ENTRIES = 256
+
+    # How long a health-probe result stays fresh; load balancers poll far
+    # more often than API availability actually changes
+    HEALTH_TTL = 30.0
+
     def __init__(self):
         self.settings = get_settings()
         self.model = None
         self.api_key = self.settings.GOOGLE_API_KEY
+        # LRU over (prompt, generation config) hashes: repeat questions
+        # against the same sources skip the multi-second API round-trip
+        self._response_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._health_cache: tuple = (0.0, None)
         self._initialize_client()
-    
+
     def _initialize_client(self) -> None:
         """Initialize Gemini API client"""
         try:
             if not self.api_key or self.api_key == "your_gemini_api_key_here":
                 logger.error("Google API key not configured")
                 return
-            
+
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            self.model = genai.GenerativeModel(self.MODEL_NAME)
             logger.info("Gemini Pro model initialized successfully")
-            
+
         except Exception as e:
             logger.error(f"Failed to initialize Gemini client: {e}")
+
+    def _response_cache_key(
+        self, prompt: str, temperature: float, max_tokens: int
+    ) -> Optional[str]:
+        """Cache key for a fully-rendered prompt, or None if uncacheable"""
+        if temperature > self.CACHE_MAX_TEMPERATURE:
+            return None
+        payload = f"{prompt}|{temperature}|{max_tokens}|{self.MODEL_NAME}"
+        return hashlib.sha256(payload.encode(), usedforsecurity=False).hexdigest()
+
+    def _response_cache_get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+        return cached
+
+    def _response_cache_put(self, key: Optional[str], text: str) -> None:
+        if key is None:
+            return
+        self._response_cache[key] = text
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self.CACHE_MAX_ENTRIES:
+            self._response_cache.popitem(last=False)
     
     def _create_rag_prompt(
         self, 
@@ -39,47 +117,35 @@ class GeminiService:
         temperature: float = 0.7
     ) -> str:
         """Create a RAG prompt with sources and question"""
-        
-        # Build context from sources
-        context_parts = []
-        for i, source in enumerate(sources, 1):
-            company = source.get("company", "Unknown")
-            date = source.get("date", "Unknown date")
-            quarter = source.get("quarter", "")
-            content = source.get("content", "")
-            similarity = source.get("similarity_score", 0)
-            
-            quarter_info = f" ({quarter})" if quarter else ""
-            
-            context_parts.append(
-                f"Source {i} - {company}{quarter_info} - {date} (Relevance: {similarity:.2f}):\n"
-                f"{content}\n"
+
+        # One join over a generator of pre-bound template calls; no
+        # intermediate list or per-field temporaries
+        context = "\n".join(
+            _SRC_TMPL(
+                i=i,
+                company=source.get("company", "Unknown"),
+                quarter_info=f" ({source['quarter']})" if source.get("quarter") else "",
+                date=source.get("date", "Unknown date"),
+                similarity=source.get("similarity_score", 0),
+                content=source.get("content", "")
             )
-        
-        context = "\n".join(context_parts)
-        
-        prompt = f"""You are a financial analyst AI assistant specialized in analyzing earnings call transcripts. 
-Your task is to provide accurate, insightful answers based on the provided financial transcript excerpts.
+            for i, source in enumerate(sources, 1)
+        )
+
+        # The static _RAG_SYSTEM preamble is a prerendered constant, so
+        # only the context and question are formatted per request
+        prompt = f"""{_RAG_SYSTEM}
 
 CONTEXT FROM FINANCIAL TRANSCRIPTS:
 {context}
 
 QUESTION: {question}
 
-INSTRUCTIONS:
-1. Base your answer primarily on the provided transcript excerpts
-2. Provide specific, factual information with clear attribution to companies and time periods
-3. If the question asks about trends, compare information across different time periods or companies
-4. If the provided context doesn't fully answer the question, acknowledge the limitations
-5. Use financial terminology appropriately and explain complex concepts when necessary
-6. Structure your response clearly with key points highlighted
-7. When referencing specific information, mention the company and time period
-
 RESPONSE:"""
 
         return prompt
     
-    def generate_response(
+    async def generate_response(
         self,
         question: str,
         sources: List[Dict[str, Any]],
@@ -97,7 +163,13 @@ RESPONSE:"""
             
             # Create RAG prompt
             prompt = self._create_rag_prompt(question, sources, temperature)
-            
+
+            cache_key = self._response_cache_key(prompt, temperature, max_tokens)
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                logger.info("Serving response from LLM cache")
+                return cached
+
             # Generate response
             start_time = time.time()
             
@@ -108,17 +180,19 @@ RESPONSE:"""
                 top_k=40
             )
             
-            response = self.model.generate_content(
+            response = await self.model.generate_content_async(
                 prompt,
                 generation_config=generation_config
             )
-            
+
             end_time = time.time()
             processing_time = end_time - start_time
             
             if response.text:
                 logger.info(f"Generated response in {processing_time:.2f}s")
-                return response.text.strip()
+                text = response.text.strip()
+                self._response_cache_put(cache_key, text)
+                return text
             else:
                 logger.warning("Empty response from Gemini")
                 return None
@@ -127,6 +201,50 @@ RESPONSE:"""
             logger.error(f"Failed to generate response: {e}")
             return None
     
+    def generate_response_stream(
+        self,
+        question: str,
+        sources: List[Dict[str, Any]],
+        temperature: float = 0.7,
+        max_tokens: int = 2000
+    ):
+        """Yield response text chunks as Gemini produces them.
+
+        Streaming drops user-perceived latency to roughly first-token time
+        instead of full generation time; callers forward the chunks as they
+        arrive.
+        """
+        try:
+            if not self.model:
+                logger.error("Gemini model not initialized")
+                return
+
+            if not sources:
+                yield self._generate_no_context_response(question)
+                return
+
+            prompt = self._create_rag_prompt(question, sources, temperature)
+
+            generation_config = genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                top_p=0.9,
+                top_k=40
+            )
+
+            response = self.model.generate_content(
+                prompt,
+                generation_config=generation_config,
+                stream=True
+            )
+
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+
+        except Exception as e:
+            logger.error(f"Failed to stream response: {e}")
+
     def _generate_no_context_response(self, question: str) -> str:
         """Generate response when no relevant context is found"""
         return (
@@ -139,7 +257,7 @@ RESPONSE:"""
             f"such as revenue, growth, market conditions, or business strategy."
         )
     
-    def generate_summary(
+    async def generate_summary(
         self,
         sources: List[Dict[str, Any]],
         topic: str = "financial performance"
@@ -172,14 +290,54 @@ Provide a comprehensive summary that:
 
 Summary:"""
             
-            response = self.model.generate_content(prompt)
+            response = await self.model.generate_content_async(prompt)
             return response.text.strip() if response.text else None
             
         except Exception as e:
             logger.error(f"Failed to generate summary: {e}")
             return None
     
-    def analyze_sentiment(self, text: str) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_sentiment(text: str) -> Optional[Dict[str, Any]]:
+        """Parse a sentiment reply: JSON first, labelled lines as fallback"""
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            data = None
+
+        if isinstance(data, dict):
+            number = _FLOAT_RE.search(str(data.get("confidence", "")))
+            return {
+                "sentiment": str(data.get("sentiment", "neutral")).lower(),
+                "confidence": float(number.group()) if number else 0.5,
+                "reasoning": str(data.get("reasoning", "Unable to determine"))
+            }
+
+        # Fallback for replies that ignored the JSON constraint
+        sentiment = "neutral"
+        confidence = 0.5
+        reasoning = "Unable to determine"
+        matched = False
+        for line in text.strip().split('\n'):
+            match = _SENT_RE.match(line)
+            if not match:
+                continue
+            matched = True
+            key, value = match.group(1).lower(), match.group(2)
+            if key == "sentiment":
+                sentiment = value.lower()
+            elif key == "confidence":
+                number = _FLOAT_RE.search(value)
+                if number:
+                    confidence = float(number.group())
+            else:
+                reasoning = value
+
+        if not matched:
+            return None
+        return {"sentiment": sentiment, "confidence": confidence, "reasoning": reasoning}
+
+    async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment of financial text"""
         try:
             if not self.model:
@@ -189,45 +347,27 @@ Summary:"""
 
 Text: {text}
 
-Provide your analysis in this format:
+Respond with a JSON object with keys "sentiment" (Positive/Negative/Neutral), "confidence" (0.0-1.0) and "reasoning" (brief explanation), or in this format:
 Sentiment: [Positive/Negative/Neutral]
 Confidence: [0.0-1.0]
-Reasoning: [Brief explanation]
+Reasoning: [Brief explanation]"""
+
+            # The pinned google-generativeai 0.3.0 has no JSON response
+            # mode; _parse_sentiment tries json.loads first and falls back
+            # to the labelled-line regexes
+            response = await self.model.generate_content_async(prompt)
 
-Analysis:"""
-            
-            response = self.model.generate_content(prompt)
-            
             if response.text:
-                # Parse response (simplified parsing)
-                lines = response.text.strip().split('\n')
-                sentiment = "neutral"
-                confidence = 0.5
-                reasoning = "Unable to determine"
-                
-                for line in lines:
-                    if line.startswith("Sentiment:"):
-                        sentiment = line.split(":", 1)[1].strip().lower()
-                    elif line.startswith("Confidence:"):
-                        try:
-                            confidence = float(line.split(":", 1)[1].strip())
-                        except ValueError:
-                            pass
-                    elif line.startswith("Reasoning:"):
-                        reasoning = line.split(":", 1)[1].strip()
-                
-                return {
-                    "sentiment": sentiment,
-                    "confidence": confidence,
-                    "reasoning": reasoning
-                }
+                parsed = self._parse_sentiment(response.text)
+                if parsed is not None:
+                    return parsed
             
         except Exception as e:
             logger.error(f"Failed to analyze sentiment: {e}")
         
         return {"sentiment": "unknown", "confidence": 0.0, "reasoning": "Analysis failed"}
     
-    def extract_key_points(
+    async def extract_key_points(
         self,
         sources: List[Dict[str, Any]],
         max_points: int = 5
@@ -249,26 +389,31 @@ Analysis:"""
 
 {combined_text}
 
-Format as a numbered list of clear, concise points:
+Return them as a JSON array of clear, concise strings, or as a numbered list."""
+
+            # The pinned google-generativeai 0.3.0 has no JSON response
+            # mode, so parse json.loads first and fall back to the
+            # numbered-list scanner for free-form replies
+            response = await self.model.generate_content_async(prompt)
 
-Key Points:"""
-            
-            response = self.model.generate_content(prompt)
-            
             if response.text:
-                # Parse numbered list
-                lines = response.text.strip().split('\n')
+                text = response.text.strip()
+                try:
+                    points = json.loads(text)
+                except (json.JSONDecodeError, TypeError):
+                    points = None
+                if isinstance(points, list):
+                    return [str(point) for point in points if point][:max_points]
+
                 key_points = []
-                
-                for line in lines:
+                for line in text.split('\n'):
                     line = line.strip()
                     if line and (line[0].isdigit() or line.startswith('-') or line.startswith('•')):
-                        # Remove numbering and clean up
                         point = line.split('.', 1)[-1].strip() if '.' in line else line
                         point = point.lstrip('- •').strip()
                         if point:
                             key_points.append(point)
-                
+
                 return key_points[:max_points]
             
         except Exception as e:
@@ -277,7 +422,18 @@ Key Points:"""
         return []
     
     def check_api_health(self) -> Dict[str, Any]:
-        """Check if Gemini API is accessible"""
+        """Check if Gemini API is accessible.
+
+        Probes the free model-listing endpoint instead of a billable
+        generation, and caches the result for HEALTH_TTL seconds so load
+        balancers polling every few seconds don't pile API round-trips
+        onto real requests.
+        """
+        now = time.time()
+        cached_at, cached = self._health_cache
+        if cached is not None and now - cached_at < self.HEALTH_TTL:
+            return cached
+
         try:
             if not self.model:
                 return {
@@ -285,37 +441,37 @@ Key Points:"""
                     "message": "Model not initialized",
                     "timestamp": datetime.now().isoformat()
                 }
-            
-            # Simple test generation
-            test_prompt = "Reply with 'OK' if you're working."
-            response = self.model.generate_content(test_prompt)
-            
-            if response.text and "OK" in response.text:
-                return {
+
+            # list_models answers without running inference, so the probe
+            # bills no tokens while still exercising auth and connectivity
+            model = next(iter(genai.list_models(page_size=1)), None)
+
+            if model is not None:
+                result = {
                     "status": "healthy",
                     "message": "API responding normally",
                     "timestamp": datetime.now().isoformat()
                 }
             else:
-                return {
+                result = {
                     "status": "warning",
                     "message": "Unexpected response from API",
                     "timestamp": datetime.now().isoformat()
                 }
-                
+
         except Exception as e:
             logger.error(f"API health check failed: {e}")
-            return {
+            result = {
                 "status": "error",
                 "message": str(e),
                 "timestamp": datetime.now().isoformat()
             }
 
-
-# Global gemini service instance
-gemini_service = GeminiService()
+        self._health_cache = (now, result)
+        return result
 
 
+@lru_cache(maxsize=1)
 def get_gemini_service() -> GeminiService:
-    """Dependency to get gemini service instance"""
-    return gemini_service 
\ No newline at end of file
+    """Dependency to get the gemini service instance (created on first use)"""
+    return GeminiService()
\ No newline at end of file
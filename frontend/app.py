@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
 import time
 import os
@@ -20,8 +21,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS; built once as a module constant, but emitted on every run
+# since Streamlit drops elements that aren't re-rendered in a rerun
+_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -65,13 +67,51 @@ st.markdown("""
         margin-bottom: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def _get_api_client() -> APIClient:
+    """One APIClient (and its requests.Session) per server process.
+
+    Streamlit reruns the whole script on every widget event; caching the
+    client keeps connection pools alive across reruns.
+    """
+    return APIClient()
+
+
+# Read-only backend metadata, cached across reruns so tab switches and
+# slider drags don't each trigger a handful of blocking HTTP calls. The
+# leading underscore on _client exempts it from cache-key hashing; the
+# "Refresh System Data" button clears these via st.cache_data.clear().
+
+@st.cache_data(ttl=15, show_spinner=False)
+def _cached_connection_ok(_client: APIClient) -> bool:
+    return _client.test_connection()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_analytics_snapshot(_client: APIClient):
+    """Health, companies and embedding status in one concurrent fetch.
+
+    The three calls are independent, so a cold cache pays the slowest
+    latency rather than the sum; warm reruns don't hit the network at all.
+    """
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        health = executor.submit(_client.get_health)
+        companies = executor.submit(_client.get_companies)
+        status = executor.submit(_client.get_embedding_status)
+        return health.result(), companies.result(), status.result()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_system_info(_client: APIClient):
+    return _client.get_system_info()
+
 
 class RAGApp:
     def __init__(self):
         """Initialize the RAG application"""
-        self.api_client = APIClient()
-        self.initialize_session_state()
+        self.api_client = _get_api_client()
         self.sidebar = Sidebar(self.api_client)
     
     def initialize_session_state(self):
@@ -100,12 +140,19 @@ class RAGApp:
         </div>
         """, unsafe_allow_html=True)
         
-        # Connection status in header
-        connection_status = self.api_client.test_connection()
+        # Connection status in header; the probe is cached so slider
+        # drags and keystrokes don't each issue a blocking HTTP call
+        connection_status = _cached_connection_ok(self.api_client)
         if connection_status:
             st.success("🟢 Connected to Backend API")
         else:
-            st.error("🔴 Backend API Connection Failed")
+            col_msg, col_btn = st.columns([5, 1])
+            with col_msg:
+                st.error("🔴 Backend API Connection Failed")
+            with col_btn:
+                if st.button("🔄 Recheck"):
+                    _cached_connection_ok.clear()
+                    st.rerun()
     
     def render_main_interface(self):
         """Render the main interface with tabs"""
@@ -225,10 +272,8 @@ class RAGApp:
         with col1:
             st.markdown("### 📈 System Metrics")
             
-            # Get system metrics
-            health = self.api_client.get_health()
-            companies_data = self.api_client.get_companies()
-            embedding_status = self.api_client.get_embedding_status()
+            # Get system metrics (fetched concurrently, cached across reruns)
+            health, companies_data, embedding_status = _cached_analytics_snapshot(self.api_client)
             
             if health:
                 st.metric("System Status", health.get('status', 'Unknown').title())
@@ -310,8 +355,15 @@ class RAGApp:
                 ("System Info", "/system/info", "GET")
             ]
             
-            for name, endpoint, method in endpoints:
-                status = self.test_endpoint_detailed(endpoint)
+            # Probe concurrently: wall time is the slowest endpoint, not
+            # the sum of all of them
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                statuses = list(executor.map(
+                    self.test_endpoint_detailed,
+                    [endpoint for _, endpoint, _ in endpoints]
+                ))
+
+            for (name, endpoint, method), status in zip(endpoints, statuses):
                 icon = "🟢" if status else "🔴"
                 st.markdown(f"{icon} **{name}** `{method} {endpoint}`")
         
@@ -329,7 +381,7 @@ class RAGApp:
             
             # System information
             if st.button("📊 Show System Info"):
-                system_info = self.api_client.get_system_info()
+                system_info = _cached_system_info(self.api_client)
                 if system_info:
                     st.json(system_info)
                 else:
@@ -403,16 +455,21 @@ class RAGApp:
                 
                 for i, result in enumerate(response.get('results', [])):
                     with st.expander(f"Result {i+1}: {result.get('company', 'Unknown')} - Score: {result.get('similarity_score', 0):.3f}"):
-                        st.markdown(f"**Document:** `{result.get('document_id', 'Unknown')}`")
-                        st.markdown(f"**Date:** {result.get('date', 'Unknown')}")
-                        st.markdown(f"**Quarter:** {result.get('quarter', 'Unknown')}")
-                        
                         # Use 'chunk' instead of 'content'
-                        chunk_content = result.get('chunk', result.get('content', 'No content available'))
-                        if chunk_content and chunk_content != 'No content available':
-                            st.markdown(f"**Content:** _{chunk_content[:400]}{'...' if len(chunk_content) > 400 else ''}_")
+                        chunk_content = result.get('chunk', result.get('content', ''))
+                        if chunk_content:
+                            content_line = f"**Content:** _{chunk_content[:400]}{'...' if len(chunk_content) > 400 else ''}_"
                         else:
-                            st.warning("⚠️ No content available for this result")
+                            content_line = "⚠️ No content available for this result"
+
+                        # One markdown block per result instead of four
+                        # separate DeltaGenerator messages
+                        st.markdown(
+                            f"**Document:** `{result.get('document_id', 'Unknown')}`\n\n"
+                            f"**Date:** {result.get('date', 'Unknown')}\n\n"
+                            f"**Quarter:** {result.get('quarter', 'Unknown')}\n\n"
+                            f"{content_line}"
+                        )
             else:
                 st.error("❌ Search failed")
     
@@ -476,15 +533,27 @@ class RAGApp:
             ("/api/v1/embeddings/cache/info", "Cache Info")
         ]
         
-        results = []
-        for endpoint, name in endpoints:
-            status = self.test_endpoint_detailed(endpoint)
-            results.append({
+        # One aggregated backend call covers every endpoint; fall back to
+        # parallel per-endpoint probes against older backends
+        status_map = self.api_client.bulk_status([endpoint for endpoint, _ in endpoints])
+        if status_map is not None:
+            statuses = [status_map.get(endpoint, False) for endpoint, _ in endpoints]
+        else:
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                statuses = list(executor.map(
+                    self.test_endpoint_detailed,
+                    [endpoint for endpoint, _ in endpoints]
+                ))
+
+        results = [
+            {
                 "Endpoint": name,
                 "URL": endpoint,
                 "Status": "✅ Working" if status else "❌ Failed"
-            })
-        
+            }
+            for (endpoint, name), status in zip(endpoints, statuses)
+        ]
+
         st.dataframe(results, use_container_width=True)
     
     def create_all_embeddings(self):
@@ -532,27 +601,43 @@ class RAGApp:
                             sources = response_data.get("sources", [])
                             if sources:
                                 with st.expander(f"📚 Sources ({len(sources)})"):
+                                    # All sources render as one markdown
+                                    # message instead of four per source
+                                    blocks = []
                                     for i, source in enumerate(sources):
-                                        st.markdown(f"**{i+1}. {source.get('company', 'Unknown')} - {source.get('date', 'Unknown')}** (Score: {source.get('similarity_score', 0):.3f})")
-                                        st.markdown(f"**Document:** `{source.get('document_id', 'Unknown')}`")
-                                        
                                         # Use 'chunk' instead of 'content'
-                                        chunk_content = source.get('chunk', source.get('content', 'No content available'))
-                                        if chunk_content and chunk_content != 'No content available':
-                                            st.markdown(f"**Content:** _{chunk_content[:300]}{'...' if len(chunk_content) > 300 else ''}_")
+                                        chunk_content = source.get('chunk', source.get('content', ''))
+                                        if chunk_content:
+                                            content_line = f"**Content:** _{chunk_content[:300]}{'...' if len(chunk_content) > 300 else ''}_"
                                         else:
-                                            st.warning("⚠️ No content available for this source")
-                                        st.markdown("---")
+                                            content_line = "⚠️ No content available for this source"
+
+                                        blocks.append(
+                                            f"**{i+1}. {source.get('company', 'Unknown')} - {source.get('date', 'Unknown')}** "
+                                            f"(Score: {source.get('similarity_score', 0):.3f})\n\n"
+                                            f"**Document:** `{source.get('document_id', 'Unknown')}`\n\n"
+                                            f"{content_line}\n\n---"
+                                        )
+                                    st.markdown("\n\n".join(blocks))
                         else:
                             st.markdown(str(response_data))
     
     def run(self):
         """Run the Streamlit application"""
+        # Session state must be touched on every script run; the rest of
+        # the object graph is cached across reruns
+        self.initialize_session_state()
+        st.markdown(_CSS, unsafe_allow_html=True)
         self.render_header()
         self.render_main_interface()
 
 
+@st.cache_resource
+def _get_app() -> RAGApp:
+    """Build the app object graph once per process instead of per rerun"""
+    return RAGApp()
+
+
 # Main execution
 if __name__ == "__main__":
-    app = RAGApp()
-    app.run() 
\ No newline at end of file
+    _get_app().run()
@@ -1,9 +1,46 @@
 import streamlit as st
+from collections import Counter
 from typing import Dict, Any, List
 import plotly.express as px
 import pandas as pd
 
 
+# Figure builders are cached on a hashable projection of the sources, so
+# UI reruns with unchanged results skip the DataFrame build and Plotly's
+# figure serialization entirely
+
+@st.cache_data(show_spinner=False)
+def _similarity_figure(rows: tuple):
+    """Bar chart of similarity scores for (company, date, score) rows"""
+    # Columnar construction: one list per column instead of a dict per
+    # row, with the Source label derived by vectorized string concat
+    df = pd.DataFrame(rows, columns=["Company", "Date", "Similarity"])
+    df["Source"] = df["Company"] + " - " + df["Date"]
+
+    fig = px.bar(
+        df,
+        x="Source",
+        y="Similarity",
+        color="Company",
+        title="Source Similarity Scores",
+        labels={"Similarity": "Similarity Score", "Source": "Source Document"}
+    )
+    fig.update_xaxis(tickangle=45)
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _distribution_figure(companies: tuple):
+    """Pie chart of source counts per company"""
+    # Single C-level pass instead of two dict lookups per source
+    counts = Counter(companies)
+    return px.pie(
+        values=list(counts.values()),
+        names=list(counts.keys()),
+        title="Sources by Company"
+    )
+
+
 class ResultsDisplay:
     """Component for displaying query results and visualizations"""
     
@@ -63,48 +100,21 @@ class ResultsDisplay:
         """Render similarity scores as a chart"""
         if not sources:
             return
-        
-        # Prepare data
-        data = []
-        for source in sources:
-            data.append({
-                "Company": source.get("company", "Unknown"),
-                "Date": source.get("date", "Unknown"),
-                "Similarity": source.get("similarity_score", 0),
-                "Source": f"{source.get('company', 'Unknown')} - {source.get('date', 'Unknown')}"
-            })
-        
-        df = pd.DataFrame(data)
-        
-        # Create chart
-        fig = px.bar(
-            df, 
-            x="Source", 
-            y="Similarity",
-            color="Company",
-            title="Source Similarity Scores",
-            labels={"Similarity": "Similarity Score", "Source": "Source Document"}
+
+        rows = tuple(
+            (
+                source.get("company", "Unknown"),
+                source.get("date", "Unknown"),
+                source.get("similarity_score", 0)
+            )
+            for source in sources
         )
-        
-        fig.update_xaxis(tickangle=45)
-        st.plotly_chart(fig, use_container_width=True)
-    
+        st.plotly_chart(_similarity_figure(rows), use_container_width=True)
+
     def render_company_distribution(self, sources: List[Dict[str, Any]]):
         """Render distribution of sources by company"""
         if not sources:
             return
-        
-        # Count sources by company
-        company_counts = {}
-        for source in sources:
-            company = source.get("company", "Unknown")
-            company_counts[company] = company_counts.get(company, 0) + 1
-        
-        # Create pie chart
-        fig = px.pie(
-            values=list(company_counts.values()),
-            names=list(company_counts.keys()),
-            title="Sources by Company"
-        )
-        
-        st.plotly_chart(fig, use_container_width=True) 
\ No newline at end of file
+
+        companies = tuple(source.get("company", "Unknown") for source in sources)
+        st.plotly_chart(_distribution_figure(companies), use_container_width=True) 
\ No newline at end of file
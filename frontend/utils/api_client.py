@@ -127,6 +127,13 @@ class APIClient:
         endpoint = f"{self.api_prefix}/embeddings/cache/info"
         return self._make_request("GET", endpoint)
     
+    def bulk_status(self, names: List[str]) -> Optional[Dict[str, bool]]:
+        """Get availability for several endpoints in one round-trip"""
+        response = self._make_request("POST", "/status/bulk", json=names, timeout=10)
+        if response is None:
+            return None
+        return response.get("statuses")
+
     def get_api_info(self) -> Optional[Dict[str, Any]]:
         """Get API information"""
         endpoint = "/info"
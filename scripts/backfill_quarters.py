@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+One-off migration: backfill the precomputed quarter field on legacy chunk
+metadata so the query path never has to parse dates at search time.
+Run once against an existing ChromaDB store; safe to re-run (chunks that
+already carry a quarter are skipped).
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add the backend path to sys.path so we can import backend modules
+backend_path = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_path))
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Backfill quarter metadata on existing ChromaDB collections"
+    )
+
+    parser.add_argument(
+        "--collections",
+        nargs="+",
+        help="Specific collection names to migrate (default: all)"
+    )
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  Financial Transcripts RAG - Quarter Metadata Backfill")
+    print("=" * 60)
+    print()
+
+    from app.core.database import get_db_manager
+
+    db_manager = get_db_manager()
+    collections = args.collections or db_manager.list_collections()
+
+    if not collections:
+        print("⚠️ No collections found; run the embedding setup first")
+        sys.exit(1)
+
+    total = 0
+    for name in collections:
+        print(f"🔄 Backfilling {name}...")
+        updated = db_manager.backfill_quarter_metadata(name)
+        print(f"   ✅ {updated} chunks updated")
+        total += updated
+
+    print(f"\n🎉 Backfill complete: {total} chunks updated across {len(collections)} collections")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()